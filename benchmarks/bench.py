@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Performance benchmark of bio-pm on seeded synthetic workloads.
+
+Times and measures peak memory (tracemalloc) of pm.pattern.parse,
+pm.analyze, sorting of statuses and pattern.list() over a grid of sequence
+lengths, mutation rates, gap rates and translate on/off. Results are saved
+as JSON so that runs can be compared for regressions:
+
+    python benchmarks/bench.py --quick -o before.json
+    python benchmarks/bench.py --quick -o after.json --compare before.json
+
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from itertools import product
+from os.path import dirname, abspath
+
+import numpy as np
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import pm
+from pm.pattern import parse
+
+
+BASES = np.frombuffer(b'ACGT', dtype=np.uint8)
+GAP = ord('-')
+
+SIZES = (100, 1000, 10000, 100000, 1000000, 10000000)
+QUICK_SIZES = (100, 1000, 10000, 100000)
+RATES = (0.0, 0.001, 0.01, 0.1)
+GAP_RATES = (0.0, 0.001)
+
+
+def make_stdseq(size, seed=0):
+    """Return a random stdseq of size bases, size rounded down to codons"""
+
+    rng = np.random.RandomState(seed)
+    size -= size % 3
+    return BASES[rng.randint(0, 4, size)].tobytes().decode('ascii')
+
+
+def make_seq(stdseq, rate, gap_rate, seed=1):
+    """Return a copy of stdseq with random substitutions and gaps.
+
+    Each base is substituted by one of the other three bases with
+    probability rate, and replaced by a gap with probability gap_rate.
+
+    """
+
+    rng = np.random.RandomState(seed)
+    codes = np.frombuffer(stdseq.encode('ascii'), dtype=np.uint8).copy()
+    size = len(codes)
+    mutated = rng.random_sample(size) < rate
+    index = np.searchsorted(BASES, codes[mutated])
+    codes[mutated] = BASES[(index + rng.randint(1, 4, len(index))) % 4]
+    codes[rng.random_sample(size) < gap_rate] = GAP
+    return codes.tobytes().decode('ascii')
+
+
+def measure(func, repeat, setup=None):
+    """Return (best seconds of repeat runs, peak traced bytes of one run)
+
+    If setup is given, each run times func(setup()) and setup() is neither
+    timed nor traced.
+
+    """
+
+    best = None
+    for _ in range(repeat):
+        args = () if setup is None else (setup(), )
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    args = () if setup is None else (setup(), )
+    tracemalloc.start()
+    try:
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_case(size, rate, gap_rate, translate, repeat, reads):
+    """Yield (name, seconds, peak_bytes) of all benchmarks of one case"""
+
+    stdseq = make_stdseq(size)
+    seq = make_seq(stdseq, rate, gap_rate)
+
+    yield ('parse',) + measure(lambda: parse(seq, stdseq, translate), repeat)
+    yield ('analyze',) + measure(lambda: pm.analyze(seq, stdseq, translate),
+                                 repeat)
+    # a fresh pattern each run, as TranslatedPattern caches its list
+    yield ('pattern.list',) + measure(
+            lambda pattern: pattern.list(), repeat,
+            setup=lambda: parse(seq, stdseq, translate))
+
+    # keep the sorted statuses within ~10M bases of reads
+    n = max(2, min(reads, 10000000 // max(size, 1)))
+    seqs = [make_seq(stdseq, rate, gap_rate, seed) for seed in range(n)]
+    statuses = list(pm.analyze_many(seqs, stdseq, translate, light=True))
+    yield ('sort',) + measure(lambda: sorted(statuses), repeat)
+
+
+def run(sizes, rates, gap_rates, translates, repeat, reads):
+    results = []
+    for size, rate, gap_rate, translate in product(sizes, rates, gap_rates,
+                                                   translates):
+        for name, seconds, peak in run_case(size, rate, gap_rate, translate,
+                                            repeat, reads):
+            result = {'name': name, 'size': size - size % 3, 'rate': rate,
+                      'gap_rate': gap_rate, 'translate': translate,
+                      'seconds': seconds, 'peak_bytes': peak}
+            results.append(result)
+            print("{name:<13} size={size:<9} rate={rate:<6} "
+                  "gap_rate={gap_rate:<6} translate={translate!s:<5} "
+                  "{seconds:10.6f}s {peak_bytes:>12}B".format(**result))
+            sys.stdout.flush()
+    return results
+
+
+def _key(result):
+    return (result['name'], result['size'], result['rate'],
+            result['gap_rate'], result['translate'])
+
+
+def compare(results, baseline, threshold):
+    """Print time ratios against baseline, return regressed results number"""
+
+    base = dict((_key(r), r) for r in baseline['results'])
+    regressions = 0
+    for result in results:
+        old = base.get(_key(result))
+        if old is None or old['seconds'] <= 0:
+            continue
+        ratio = result['seconds'] / old['seconds']
+        flag = ''
+        if ratio > threshold:
+            regressions += 1
+            flag = '  REGRESSION'
+        print("{:<13} {!s:<40} x{:.2f}{}".format(result['name'],
+                                                 _key(result)[1:], ratio,
+                                                 flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--quick', action='store_true',
+                        help="sizes up to 100 kb only")
+    parser.add_argument('--sizes', type=int, nargs='+')
+    parser.add_argument('--rates', type=float, nargs='+', default=RATES)
+    parser.add_argument('--gap-rates', type=float, nargs='+',
+                        default=GAP_RATES)
+    parser.add_argument('--translate', choices=('on', 'off', 'both'),
+                        default='both')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="timed runs of each benchmark, best is kept")
+    parser.add_argument('--reads', type=int, default=1000,
+                        help="statuses sorted in the sort benchmark")
+    parser.add_argument('-o', '--output', help="write results to JSON file")
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="compare with results in a JSON file")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="time ratio over baseline taken as regression")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    translates = {'on': (True,), 'off': (False,),
+                  'both': (True, False)}[args.translate]
+    results = run(sizes, args.rates, args.gap_rates, translates,
+                  args.repeat, args.reads)
+    data = {'meta': {'pm': pm.__version__, 'numpy': np.__version__,
+                     'python': platform.python_version(),
+                     'machine': platform.machine(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,6 +4,16 @@ Analyze PM status for nucleotide sequence.
 
 Functions:
 analyze
+analyze_many
+select_best
+classify
+reanalyze
+rank
+
+Class:
+
+Reference
+Pre-processed stdseq to be shared by many analyses. See pm.reference.
 
 Exception:
 
@@ -13,15 +23,27 @@ Referenced from pm.status.
 
 """
 
+from collections import OrderedDict
+from functools import partial
+from heapq import heappush, heapreplace
+
+import numpy as np
 
-from .pattern import parse, TranslationError
-from .status import Y, Conserved, PM, NA
+from .pattern import (parse, TranslationError, _count_gaps, _count_mutants,
+                      _upper, _try_as_codes, _as_str, _check_lengths,
+                      _translate_codon, _codon_slicing, _pack,
+                      TranslatedPattern, PlainPattern, CompactPlainPattern,
+                      CompactTranslatedPattern)
+from .status import Y, Conserved, PM, NA, score, sort_key, rank, _int_key
+from .reference import Reference, intern
+from . import instrument as _instrument
 
 
 __version__ = '0.1.5-dev'
 
 
-def analyze(seq, stdseq, translate=True):
+def analyze(seq, stdseq, translate=True, table=1, compact=False, light=False,
+            lazy=False):
     """Analyze the PM between pairwised seq and stdseq.
 
     Analyze the consistence of nucleotide base between a sequence and it's
@@ -33,18 +55,366 @@ def analyze(seq, stdseq, translate=True):
     Args:
     seq -- nucleotide sequence
 
-    stdseq -- glable pairwised standard sequence of seq
+    stdseq -- glable pairwised standard sequence of seq, or a
+              pm.reference.Reference object of it
 
     translate -- active translate model, default True. NOTE: if translate 
                  mode is actived, an exception TranslationError might raise
                  when invalid codon occurs.
 
+    table -- NCBI genetic code id or name used in translate model, 
+             default 1, the standard code
+
+    compact -- keep the mutation pattern in a compact array backed
+               object, see pm.pattern.CompactTranslatedPattern. Default
+               False.
+
+    light -- lightweight model, default False. If actived, the status 
+             does not keep seq and its pattern is compact, so that its 
+             memory does not depend on the sequence length.
+
+    lazy -- lazy model, default False. If actived, only the counts and the
+            status are worked out, and the pattern is built on the first
+            access of status.pattern. NOTE: seq is kept until then, so
+            lazy is ignored in light model, where the pattern is built at
+            once and seq is not kept.
+
+    """
+
+    if not isinstance(stdseq, Reference):
+        stdseq = intern(stdseq)
+    return _analyze(seq, stdseq, translate, table, compact, light, lazy)
+
+
+def analyze_many(seqs, stdseq, translate=True, table=1, compact=False,
+                 light=False, lazy=False):
+    """Analyze the PM between each of seqs and the same stdseq.
+
+    The stdseq is prepared only once, see pm.reference.Reference, so that
+    the cost for each sequence covers only the work on the sequence itself.
+
+    Yield point mutation object: Y/Convered/PM/NA for each seq in order.
+
+    Args:
+    seqs -- iterable of nucleotide sequences pairwised with stdseq
+
+    stdseq -- glable pairwised standard sequence, or a
+              pm.reference.Reference object of it
+
+    translate -- active translate model, default True. See analyze.
+
+    table -- NCBI genetic code id or name, default 1. See analyze.
+
+    compact -- keep compact mutation pattern, default False. See analyze.
+
+    light -- lightweight model, default False. See analyze.
+
+    lazy -- lazy model, default False. See analyze.
+
+    """
+
+    if not isinstance(stdseq, Reference):
+        stdseq = intern(stdseq)
+    for seq in seqs:
+        yield _analyze(seq, stdseq, translate, table, compact, light, lazy)
+
+
+def select_best(seqs, stdseq, k=1, translate=True, table=1):
+    """Select the best k statuses of seqs against the same stdseq.
+
+    Statuses are ordered as Y > Conserved > PM > NA, see pm.status. A seq
+    is first bounded from its base counts only; if it can not get into the 
+    current best k, its pattern and status are never built. Once k statuses 
+    with the best possible key are found, the rest of seqs is not read.
+    Statuses are ranked on their exact sort keys, see pm.status.sort_key.
+
+    Return [(index_in_seqs, status), ...], the best first. Equal statuses 
+    are kept in the order of seqs.
+
+    Args:
+    seqs -- iterable of nucleotide sequences pairwised with stdseq
+
+    stdseq -- glable pairwised standard sequence, or a
+              pm.reference.Reference object of it
+
+    k -- number of statuses to select, default 1
+
+    translate -- active translate model, default True. See analyze.
+
+    table -- NCBI genetic code id or name, default 1. See analyze.
+
+    """
+
+    if k < 1:
+        raise ValueError("k must be a positive integer")
+    if not isinstance(stdseq, Reference):
+        stdseq = intern(stdseq)
+    best_key = _int_key(*sort_key('Y', aa_pm=0 if translate else None))
+    heap = []
+    for index, seq in enumerate(seqs):
+        if len(heap) == k:
+            bound = _key_bound(seq, stdseq, translate)
+            if bound is not None and bound <= heap[0][0]:
+                continue
+        status = _analyze(seq, stdseq, translate, table)
+        item = (status._key, -index, status)
+        if len(heap) < k:
+            heappush(heap, item)
+        elif item[:2] > heap[0][:2]:
+            heapreplace(heap, item)
+        if len(heap) == k and heap[0][0] >= best_key:
+            break
+    return [(-index, status)
+            for _, index, status in sorted(heap, reverse=True)]
+
+
+_CLASSIFY_CHUNK = 3 * 4096
+
+
+def classify(seq, stdseq, translate=True, table=1):
+    """Classify the PM status between pairwised seq and stdseq.
+
+    Same status as pm.analyze gives, but no pattern, counts or status
+    object is built, and the scanning stops once the status is settled:
+    the first gap means NA, and after the first amino acid change only
+    gaps are looked for. seq is scanned chunk by chunk, so for a heavily
+    mutated or gapped seq only a fraction of it is touched. NOTE: an
+    invalid codon after the point the status is settled does not raise
+    TranslationError as it does in pm.analyze.
+
+    Return status class: Y/Conserved/PM/NA.
+
+    Args:
+    seq -- nucleotide sequence
+
+    stdseq -- glable pairwised standard sequence of seq, or a
+              pm.reference.Reference object of it
+
+    translate -- active translate model, default True. See analyze.
+
+    table -- NCBI genetic code id or name, default 1. See analyze.
+
+    """
+
+    if not isinstance(stdseq, Reference):
+        stdseq = intern(stdseq)
+    length = len(seq)
+    if length != stdseq.length:
+        raise ValueError("inconsistent length between seq and stdseq")
+    _check_lengths(seq, stdseq._parsed_upper, translate)
+    if stdseq.codes is None:
+        return type(_analyze(seq, stdseq, translate, table))
+
+    gap = ord('-')
+    mutated = aa_mutated = False
+    for start in range(0, length, _CLASSIFY_CHUNK):
+        stop = start + _CLASSIFY_CHUNK
+        codes = _try_as_codes(_upper(seq[start:stop]))
+        if codes is None:
+            return type(_analyze(seq, stdseq, translate, table))
+        stdcodes = stdseq.codes[start:stop]
+        idx = np.flatnonzero(codes != stdcodes)
+        if len(idx) == 0:
+            continue
+        if not translate:
+            return NA
+        if np.any((codes[idx] == gap) | (stdcodes[idx] == gap)):
+            return NA
+        mutated = True
+        if aa_mutated:
+            continue
+        for codon_start in np.unique(idx - idx % 3).tolist():
+            aa = _translate_codon(
+                    _as_str(codes[codon_start:codon_start+3]), table)
+            if aa != stdseq.aa((start + codon_start) // 3 + 1, table):
+                aa_mutated = True
+                break
+    if aa_mutated:
+        return PM
+    return Conserved if mutated else Y
+
+
+def reanalyze(status, edits, table=1):
+    """Analyze the status again after a few bases of its seq are edited.
+
+    Only the edited positions, and in translate model their codons, are
+    compared again; the other mutants are taken from status.pattern. So
+    the cost depends on the edits and the mutants number rather than on
+    the sequence length. The same status as pm.analyze on the edited seq
+    is given, and status is not changed. NOTE: the pattern of a status
+    analyzed in lazy model is built first, see pm.analyze.
+
+    Return point mutation object: Y/Convered/PM/NA, with the edited seq.
+
+    Args:
+    status -- status object analyzed by pm.analyze, not in light model as
+              it must keep seq. Translate model is taken from status.
+
+    edits -- iterable of (position, base), 1-based position in the
+             pairwised seq, base a single base or '-'. The later edit 
+             wins at a same position.
+
+    table -- NCBI genetic code id or name the status is analyzed with,
+             default 1. See analyze.
+
+    """
+
+    seq = status.seq
+    if seq is None:
+        raise ValueError("status does not keep seq, analyzed in light model")
+    reference = status.reference
+    if reference is None:
+        reference = intern(status.stdseq)
+    length = len(seq)
+    edits = OrderedDict(edits)
+    for pos, base in edits.items():
+        if not 1 <= pos <= length:
+            raise ValueError("edit position {} out of seq".format(pos))
+        if len(base) != 1:
+            raise ValueError("edit must replace a single base")
+    seq = _apply_edits(seq, edits)
+    translate = status.aa_pm is not None
+    pattern = status.pattern
+    compact = isinstance(pattern, (CompactPlainPattern, 
+                                   CompactTranslatedPattern))
+
+    mutants = OrderedDict(pattern.mutants.items())
+    gaps, nt_pm = status.gaps, status.nt_pm
+    inserted = False
+    for pos in edits:
+        stdv = _as_str(reference._parsed_upper[pos-1:pos])
+        v = _as_str(seq[pos-1:pos]).upper()
+        old = mutants.get(pos)
+        if old is not None:
+            if '-' in old:
+                gaps -= 1
+            else:
+                nt_pm -= 1
+        if v != stdv:
+            # an existing key keeps its place, the order breaks only when
+            # a new position is added
+            mutants[pos] = (stdv, v)
+            inserted = inserted or old is None
+            if stdv == '-' or v == '-':
+                gaps += 1
+            else:
+                nt_pm += 1
+        elif old is not None:
+            del mutants[pos]
+    if inserted:
+        mutants = OrderedDict(sorted(mutants.items()))
+
+    if not translate:
+        pattern = _pack(mutants) if compact else PlainPattern(mutants)
+        aa_pm = None
+    else:
+        aa_mutants = OrderedDict(pattern.aa_mutants.items())
+        assoc_dict = dict(pattern.assoc_dict.items())
+        aa_pm = status.aa_pm
+        inserted = False
+        codons = set(_codon_slicing(pos) for pos in edits)
+        for aa_pos, start, stop in sorted(codons):
+            old = aa_mutants.get(aa_pos)
+            if old is not None and _is_aa_pm(*old):
+                aa_pm -= 1
+            codon_mutants = [pos for pos in range(start + 1, stop + 1)
+                             if pos in mutants]
+            for pos in range(start + 1, stop + 1):
+                assoc_dict.pop(pos, None)
+            if not codon_mutants:
+                if old is not None:
+                    del aa_mutants[aa_pos]
+                continue
+            aa = _translate_codon(_as_str(seq[start:stop]).upper(), table)
+            aa_mutants[aa_pos] = (reference.aa(aa_pos, table), aa)
+            inserted = inserted or old is None
+            if _is_aa_pm(*aa_mutants[aa_pos]):
+                aa_pm += 1
+            for pos in codon_mutants:
+                assoc_dict[pos] = aa_pos
+        if inserted:
+            aa_mutants = OrderedDict(sorted(aa_mutants.items()))
+        if compact:
+            pattern = _pack(mutants, aa_mutants, assoc_dict)
+        else:
+            pattern = TranslatedPattern(mutants, aa_mutants, assoc_dict)
+
+    status = _classify(gaps, nt_pm, aa_pm, translate)
+    return status(seq, pattern=pattern, length=length, gaps=gaps,
+                  nt_pm=nt_pm, aa_pm=aa_pm, reference=reference)
+
+
+def _apply_edits(seq, edits):
+    """Return copy of seq with {position: base} edits applied"""
+
+    if isinstance(seq, str):
+        pieces, previous = [], 0
+        for pos in sorted(edits):
+            pieces.append(seq[previous:pos-1])
+            pieces.append(edits[pos])
+            previous = pos
+        pieces.append(seq[previous:])
+        return ''.join(pieces)
+    edited = bytearray(_try_as_codes(seq).tobytes())
+    for pos, base in edits.items():
+        edited[pos-1] = ord(base)
+    return bytes(edited)
+
+
+def _is_aa_pm(stdv, v):
+    """Whether an amino mutant counts in aa_pm"""
+
+    return stdv != v and stdv != '-' and v != '-'
+
+
+def _key_bound(seq, reference, translate):
+    """Return the highest sort key seq could get, None if it is unknown.
+
+    The key is folded into an int as status._key is, see
+    pm.status._int_key.
+
     """
-        
+
+    if len(seq) != reference.length:
+        return None
+    counts = _count_mutants(_upper(seq), reference._parsed_upper,
+                           reference.codes)
+    if counts is None:
+        return None
+    gaps, nt_pm = counts
+    aa_pm = 0 if translate else None
+    if gaps > 0 or (nt_pm > 0 and not translate):
+        return _int_key(*sort_key('NA', gaps, nt_pm, aa_pm))
+    if nt_pm == 0:
+        return _int_key(*sort_key('Y', gaps, nt_pm, aa_pm))
+    return _int_key(*sort_key('Conserved', gaps, nt_pm, aa_pm))
+
+
+def _analyze(seq, reference, translate, table=1, compact=False, light=False,
+             lazy=False):
+    """Analyze seq against a pm.reference.Reference object"""
+
+    timer = _instrument._start()
     length = len(seq)
-    if length != len(stdseq):
+    if length != reference.length:
         raise ValueError("inconsistent length between seq and stdseq")
-    pattern = parse(seq, stdseq, translate=translate)
+    if lazy and not light:
+        counts = reference.count(seq, translate=translate, table=table)
+        if counts is not None:
+            gaps, nt_pm, aa_pm = counts
+            status_timer = _instrument._start()
+            status = _classify(gaps, nt_pm, aa_pm, translate)(
+                    seq, length=length, gaps=gaps, nt_pm=nt_pm, aa_pm=aa_pm,
+                    reference=reference)
+            status._defer_pattern(partial(_parse_uncounted, reference, seq,
+                                          translate, table, compact))
+            _instrument._stop('status', status_timer)
+            _instrument._stop('analyze', timer)
+            _instrument._count('reads', 1)
+            return status
+
+    pattern = reference.parse(seq, translate=translate, table=table,
+                              compact=compact or light)
     gaps, nt_pm = 0, 0
     for stdv, v in pattern.mutants.values():
         assert stdv != v, \
@@ -53,26 +423,41 @@ def analyze(seq, stdseq, translate=True):
             gaps += 1
         else:
             nt_pm += 1
-    assert gaps == stdseq.count("-") + seq.count("-"), \
+    assert gaps == reference.gaps + _count_gaps(seq), \
             "inconsistent gaps number between sequence and pattern."
 
     aa_pm = len([None for stdv, v in pattern.aa_mutants.values() if stdv != v \
                     and stdv != '-' and v != '-']) if translate else None
 
+    status_timer = _instrument._start()
+    status = _classify(gaps, nt_pm, aa_pm, translate)
+    status = status(None if light else seq, pattern=pattern, length=length,
+                    gaps=gaps, nt_pm=nt_pm, aa_pm=aa_pm, reference=reference)
+    _instrument._stop('status', status_timer)
+    _instrument._stop('analyze', timer)
+    _instrument._count('reads', 1)
+    return status
+
+
+def _parse_uncounted(reference, seq, translate, table, compact):
+    """Parse the pattern of a lazy status, its counters already reported"""
+
+    with _instrument._uncounted():
+        return reference.parse(seq, translate=translate, table=table,
+                               compact=compact)
+
+
+def _classify(gaps, nt_pm, aa_pm, translate):
+    """Return status class for the counts"""
+
     if gaps > 0:
-        return NA(seq, stdseq, pattern=pattern, length=length, 
-                  gaps=gaps, nt_pm=nt_pm, aa_pm=aa_pm)
+        return NA
     if nt_pm == 0:
-        return Y(seq, stdseq, pattern=pattern, length=length, 
-                 gaps=gaps, nt_pm=nt_pm, aa_pm=aa_pm)
+        return Y
     if not translate:
-        return NA(seq, stdseq, pattern=pattern, length=length, 
-                  gaps=gaps, nt_pm=nt_pm, aa_pm=aa_pm)
+        return NA
     if aa_pm == 0:
-        return Conserved(seq, stdseq, pattern=pattern, length=length, 
-                         gaps=gaps, nt_pm=nt_pm, aa_pm=aa_pm)
-    else:
-        return PM(seq, stdseq, pattern=pattern, length=length, 
-                  gaps=gaps, nt_pm=nt_pm, aa_pm=aa_pm)
+        return Conserved
+    return PM
 
 __all__ = (analyze, TranslationError, )
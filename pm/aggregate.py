@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+Population-level aggregation of PM patterns.
+
+MutationPileup counts, for a cohort of reads against one stdseq, the base
+seen at every position and the amino acid seen at every codon. Only the
+mutants found by the pattern diff are counted; the reference base and
+amino acid are filled in from the number of reads, so adding a read costs
+its mutants, not its length, and no pattern is kept.
+
+Class:
+
+MutationPileup(stdseq, translate=True, table=1)
+
+Const:
+
+NT_ALPHABET
+columns of the nucleotide count matrix, U is counted as T and any other
+base as N
+
+AA_ALPHABET
+columns of the amino acid count matrix, any other amino acid is counted
+as X
+
+"""
+
+import numpy as np
+
+from .columnar import _uint_view
+from .pattern import CompactPlainPattern, CompactTranslatedPattern
+from .reference import Reference, intern
+
+
+NT_ALPHABET = 'ACGTN-'
+
+AA_ALPHABET = 'ACDEFGHIKLMNPQRSTVWY*X-'
+
+
+def _make_index(alphabet, other, aliases=()):
+    """Return uint8 array mapping an ascii code to its alphabet column.
+
+    aliases -- (alias, char) pairs counting alias in the column of char
+
+    """
+
+    index = np.full(256, alphabet.index(other), dtype=np.uint8)
+    columns = [(c, i) for i, c in enumerate(alphabet)]
+    columns += [(alias, alphabet.index(c)) for alias, c in aliases]
+    for c, i in columns:
+        index[ord(c)] = index[ord(c.lower())] = i
+    return index
+
+
+# as in the codon table, U is read as T
+_NT_INDEX = _make_index(NT_ALPHABET, 'N', aliases=[('U', 'T')])
+_AA_INDEX = _make_index(AA_ALPHABET, 'X')
+
+
+class MutationPileup(object):
+    """Per-position base and amino acid counts of reads against a stdseq
+
+    Attributes:
+    reference -- pm.reference.Reference object of the stdseq
+    translate -- whether amino acids are counted
+    table -- NCBI genetic code id or name used in translate model
+    reads -- number of reads added
+    nt_mutant_counts -- int64 array (length, len(NT_ALPHABET)), counts of
+                        the mutated bases only
+    aa_mutant_counts -- int64 array (length // 3, len(AA_ALPHABET)), counts
+                        of the changed amino acids only, None if translate
+                        is False
+    nt_counts -- nt_mutant_counts with the reference bases filled in
+    aa_counts -- aa_mutant_counts with the reference amino acids filled in
+
+    Row i of the matrices is position i+1, in the pairwised coordinate of
+    stdseq, the same as pattern positions.
+
+    Methods:
+    __init__(self, stdseq, translate=True, table=1)
+
+    add(self, seq):
+        count the mutants of a seq pairwised with stdseq
+
+    add_pattern(self, pattern):
+        count the mutants of a pattern parsed against stdseq
+
+    update(self, seqs):
+        add each of seqs
+
+    merge(self, other):
+        add the counts of another pileup of the same stdseq
+
+    nt_frequencies(self):
+        return nt_counts / reads
+
+    aa_frequencies(self):
+        return aa_counts / reads
+
+    """
+
+    def __init__(self, stdseq, translate=True, table=1):
+        """
+        Args:
+        stdseq -- glable pairwised standard sequence, or a
+                  pm.reference.Reference object of it
+
+        translate -- count amino acids, default True. See pm.analyze.
+
+        table -- NCBI genetic code id or name, default 1. See pm.analyze.
+
+        """
+
+        if not isinstance(stdseq, Reference):
+            stdseq = intern(stdseq)
+        if translate and stdseq.length % 3 != 0:
+            raise ValueError("sequence length must be triple in translate "
+                             "model")
+        self.reference = stdseq
+        self.translate = translate
+        self.table = table
+        self.reads = 0
+        self.nt_mutant_counts = np.zeros((stdseq.length, len(NT_ALPHABET)),
+                                         dtype=np.int64)
+        if translate:
+            self.aa_mutant_counts = np.zeros(
+                    (stdseq.length // 3, len(AA_ALPHABET)), dtype=np.int64)
+        else:
+            self.aa_mutant_counts = None
+        self._std_nt = None
+        self._std_aa = None
+
+    def __len__(self):
+        return self.reads
+
+    def add(self, seq):
+        """Count the mutants of seq pairwised with stdseq"""
+
+        self.add_pattern(self.reference.parse(
+                seq, translate=self.translate, table=self.table, compact=True))
+
+    def add_pattern(self, pattern):
+        """Count the mutants of a pattern parsed against stdseq.
+
+        The pattern must be parsed in translate model if this pileup
+        counts amino acids, e.g. status.pattern of pm.analyze.
+
+        """
+
+        positions, variants = _nt_arrays(pattern)
+        np.add.at(self.nt_mutant_counts,
+                  (positions.astype(np.intp) - 1, _NT_INDEX[variants]), 1)
+        if self.translate:
+            aa_positions, aa_stdvariants, aa_variants = _aa_arrays(pattern)
+            changed = aa_stdvariants != aa_variants
+            np.add.at(self.aa_mutant_counts,
+                      (aa_positions[changed].astype(np.intp) - 1,
+                       _AA_INDEX[aa_variants[changed]]), 1)
+        self.reads += 1
+
+    def update(self, seqs):
+        """Add each of seqs, see add"""
+
+        for seq in seqs:
+            self.add(seq)
+
+    def merge(self, other):
+        """Add the counts of other, a MutationPileup of the same stdseq.
+
+        Useful to combine the pileups built by parallel workers. Return
+        self.
+
+        """
+
+        if (self.reference is not other.reference
+                and self.reference.digest != other.reference.digest):
+            raise ValueError("can not merge pileups of different stdseqs")
+        if (self.translate, self.table) != (other.translate, other.table):
+            raise ValueError("can not merge pileups of different translate "
+                             "model or table")
+        self.nt_mutant_counts += other.nt_mutant_counts
+        if self.translate:
+            self.aa_mutant_counts += other.aa_mutant_counts
+        self.reads += other.reads
+        return self
+
+    @property
+    def nt_counts(self):
+        """Base counts at each position, reference bases included"""
+
+        if self._std_nt is None:
+            self._std_nt = _NT_INDEX[np.frombuffer(
+                    self.reference.upper.encode('ascii'), dtype=np.uint8)]
+        return _fill(self.nt_mutant_counts, self._std_nt, self.reads)
+
+    @property
+    def aa_counts(self):
+        """Amino acid counts at each codon, reference amino acids included.
+
+        None if translate is False. Raise TranslationError when stdseq
+        has an invalid codon.
+
+        """
+
+        if not self.translate:
+            return None
+        if self._std_aa is None:
+            aa = ''.join(self.reference.aa(aa_pos, self.table) for aa_pos
+                         in range(1, len(self.aa_mutant_counts) + 1))
+            self._std_aa = _AA_INDEX[np.frombuffer(aa.encode('ascii'),
+                                                   dtype=np.uint8)]
+        return _fill(self.aa_mutant_counts, self._std_aa, self.reads)
+
+    def nt_frequencies(self):
+        """Return base frequencies at each position, nt_counts / reads"""
+
+        return _frequencies(self.nt_counts, self.reads)
+
+    def aa_frequencies(self):
+        """Return amino acid frequencies at each codon, aa_counts / reads.
+
+        None if translate is False.
+
+        """
+
+        if not self.translate:
+            return None
+        return _frequencies(self.aa_counts, self.reads)
+
+    def __repr__(self):
+        return "<pm.aggregate.MutationPileup object with: length={}, " \
+               "reads={}, translate={}>".format(self.reference.length,
+                                                self.reads, self.translate)
+
+
+def _fill(mutant_counts, std_index, reads):
+    """Return mutant_counts with reads not counted put in std_index column"""
+
+    counts = mutant_counts.copy()
+    rows = np.arange(len(counts))
+    counts[rows, std_index] += reads - mutant_counts.sum(axis=1)
+    return counts
+
+
+def _frequencies(counts, reads):
+    if reads == 0:
+        return np.zeros(counts.shape)
+    return counts / float(reads)
+
+
+def _nt_arrays(pattern):
+    """Return (positions, variants) arrays of pattern's nucleotide mutants"""
+
+    if isinstance(pattern, (CompactPlainPattern, CompactTranslatedPattern)):
+        return (_uint_view(pattern.positions),
+                np.frombuffer(pattern.variants, dtype=np.uint8))
+    mutants = pattern.mutants
+    positions = np.fromiter(mutants, dtype=np.int64, count=len(mutants))
+    variants = ''.join(v for _, v in mutants.values()).encode('ascii')
+    return positions, np.frombuffer(variants, dtype=np.uint8)
+
+
+def _aa_arrays(pattern):
+    """Return (positions, stdvariants, variants) arrays of amino mutants"""
+
+    if isinstance(pattern, CompactTranslatedPattern):
+        return (_uint_view(pattern.aa_positions),
+                np.frombuffer(pattern.aa_stdvariants, dtype=np.uint8),
+                np.frombuffer(pattern.aa_variants, dtype=np.uint8))
+    aa_mutants = pattern.aa_mutants
+    positions = np.fromiter(aa_mutants, dtype=np.int64, count=len(aa_mutants))
+    values = aa_mutants.values()
+    stdvariants = ''.join(v[0] for v in values).encode('ascii')
+    variants = ''.join(v[1] for v in values).encode('ascii')
+    return (positions, np.frombuffer(stdvariants, dtype=np.uint8),
+            np.frombuffer(variants, dtype=np.uint8))
+
+
+__all__ = ["MutationPileup", "NT_ALPHABET", "AA_ALPHABET", ]
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio interface of PM analyzing.
+
+pm.analyze blocks the event loop for as long as it runs. The coroutines
+here run it in an executor instead, a thread pool by default, and bound
+the number of analyses in flight so that a burst of reads queues up
+rather than piling onto the executor. Cancelling an awaiting task cancels
+the analyses it has queued that have not started yet.
+
+For long sequences use a concurrent.futures.ProcessPoolExecutor, as
+analyzing holds the GIL for most of its time. The analyzer then places
+each stdseq once in shared memory, see pm.shared.SharedReference, jobs
+send only its name to the workers, and only the data of the read comes
+back.
+
+NOTE:
+    This module needs Python 3.7 or later, and 3.8 or later with a
+    process executor. The shared memory blocks of an analyzer are removed
+    on close(), leaving the with block, or when it is garbage collected.
+
+Functions:
+analyze(seq, stdseq, translate=True, table=1, compact=False, light=False,
+        executor=None)
+analyze_many(seqs, stdseq, translate=True, table=1, compact=False,
+             light=False, executor=None, max_pending=16)
+
+Class:
+
+AsyncAnalyzer(executor=None, max_pending=16)
+
+"""
+
+import asyncio
+import weakref
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from . import _analyze
+from .parallel import _make_status
+from .reference import Reference, intern
+
+
+class AsyncAnalyzer(object):
+    """Run PM analyses in an executor with a bound of jobs in flight
+
+    The bound is shared by all the coroutines of the object, so that one
+    analyzer can serve many request handlers at once.
+
+    Attributes:
+    executor -- concurrent.futures executor, None for the default executor
+                of the event loop
+    max_pending -- max number of analyses submitted and not done, per
+                   event loop
+
+    Methods:
+    __init__(self, executor=None, max_pending=16)
+
+    analyze(self, seq, stdseq, translate=True, table=1, compact=False,
+            light=False):
+        coroutine, same as pm.analyze
+
+    analyze_many(self, seqs, stdseq, translate=True, table=1,
+                 compact=False, light=False):
+        async generator, same as pm.analyze_many
+
+    close(self):
+        remove the shared memory blocks of the stdseqs sent to processes
+
+    """
+
+    def __init__(self, executor=None, max_pending=16):
+        """
+        Args:
+        executor -- thread or process executor, default the event loop's
+        max_pending -- max number of analyses in flight, must be positive
+
+        """
+
+        if max_pending < 1:
+            raise ValueError("max_pending must be a positive integer")
+        self.executor = executor
+        self.max_pending = max_pending
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._shared = {}
+        self._finalizer = weakref.finalize(self, _unlink_all, self._shared)
+
+    async def analyze(self, seq, stdseq, translate=True, table=1,
+                      compact=False, light=False):
+        """Analyze the PM between seq and stdseq in the executor.
+
+        Wait while max_pending analyses are in flight. See pm.analyze for
+        the arguments.
+
+        """
+
+        return await (await self._submit(seq, stdseq, translate, table,
+                                         compact, light))
+
+    async def analyze_many(self, seqs, stdseq, translate=True, table=1,
+                           compact=False, light=False):
+        """Yield status of each of seqs in order, analyzed in the executor.
+
+        seqs is an iterable or an async iterable. Seqs are read ahead only
+        as far as max_pending allows. Closing the generator, or cancelling
+        the task iterating it, cancels the analyses not yet started.
+
+        See pm.analyze_many for the arguments.
+
+        """
+
+        if not isinstance(stdseq, Reference):
+            stdseq = intern(stdseq)
+        pending = deque()
+        try:
+            async for seq in _aiter(seqs):
+                if len(pending) >= self.max_pending:
+                    yield await pending.popleft()
+                pending.append(await self._submit(seq, stdseq, translate,
+                                                  table, compact, light))
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for job in pending:
+                job.cancel()
+
+    async def _submit(self, seq, stdseq, translate, table, compact, light):
+        """Wait for a free slot and submit an analysis, return its future"""
+
+        loop = asyncio.get_running_loop()
+        # a semaphore is bound to the event loop it is first used in
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = \
+                asyncio.Semaphore(self.max_pending)
+        await semaphore.acquire()
+        try:
+            if isinstance(self.executor, ProcessPoolExecutor):
+                job = _submit_to_process(loop, self.executor, seq, stdseq,
+                                         self._share(stdseq, table),
+                                         translate, table, compact, light)
+            else:
+                job = loop.run_in_executor(self.executor, partial(
+                        _analyze_in_thread, seq, stdseq, translate, table,
+                        compact, light))
+        except BaseException:
+            semaphore.release()
+            raise
+        job.add_done_callback(lambda _: semaphore.release())
+        return job
+
+    def _share(self, stdseq, table):
+        """Return the SharedReference of stdseq sent to worker processes"""
+
+        from .shared import SharedReference
+        if isinstance(stdseq, SharedReference):
+            return stdseq
+        reference = stdseq if isinstance(stdseq, Reference) \
+                    else intern(stdseq)
+        try:
+            return self._shared[reference.digest]
+        except KeyError:
+            pass
+        shared = self._shared[reference.digest] = \
+            SharedReference.create(reference, table)
+        return shared
+
+    def close(self):
+        """Remove the shared memory blocks of the stdseqs.
+
+        Analyses still in flight in processes fail once their block is
+        removed.
+
+        """
+
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return "<pm.aio.AsyncAnalyzer object with: executor={}, " \
+               "max_pending={}>".format(self.executor, self.max_pending)
+
+
+_analyzers = weakref.WeakKeyDictionary()
+_default_analyzer = [None]
+
+
+def _shared_analyzer(executor):
+    """Return the AsyncAnalyzer shared by the analyze calls of executor"""
+
+    if executor is None:
+        if _default_analyzer[0] is None:
+            _default_analyzer[0] = AsyncAnalyzer()
+        return _default_analyzer[0]
+    try:
+        return _analyzers[executor]
+    except KeyError:
+        pass
+    analyzer = _analyzers[executor] = AsyncAnalyzer(executor)
+    return analyzer
+
+
+async def analyze(seq, stdseq, translate=True, table=1, compact=False,
+                  light=False, executor=None):
+    """Analyze the PM between seq and stdseq in executor, see pm.analyze.
+
+    Concurrent calls with the same executor share one AsyncAnalyzer, so
+    that no more than its default max_pending analyses are in flight.
+
+    executor -- thread or process executor, default the event loop's
+
+    """
+
+    return await _shared_analyzer(executor).analyze(
+            seq, stdseq, translate, table, compact, light)
+
+
+async def analyze_many(seqs, stdseq, translate=True, table=1, compact=False,
+                       light=False, executor=None, max_pending=16):
+    """Yield status of each of seqs in order, analyzed in executor.
+
+    See AsyncAnalyzer.analyze_many.
+
+    """
+
+    with AsyncAnalyzer(executor, max_pending) as analyzer:
+        async for status in analyzer.analyze_many(seqs, stdseq, translate,
+                                                  table, compact, light):
+            yield status
+
+
+async def _aiter(seqs):
+    """Iterate seqs as an async iterable"""
+
+    if hasattr(seqs, '__aiter__'):
+        async for seq in seqs:
+            yield seq
+    else:
+        for seq in seqs:
+            yield seq
+
+
+def _analyze_in_thread(seq, stdseq, translate, table, compact, light):
+    if not isinstance(stdseq, Reference):
+        stdseq = intern(stdseq)
+    return _analyze(seq, stdseq, translate, table, compact, light)
+
+
+def _submit_to_process(loop, executor, seq, stdseq, shared, translate,
+                       table, compact, light):
+    """Submit an analysis to a process executor.
+
+    Only the name of shared, the SharedReference of stdseq, is sent. Return
+    a future of the status, rebuilt against the Reference in this process.
+
+    """
+
+    reference = stdseq if isinstance(stdseq, Reference) else intern(stdseq)
+    job = loop.run_in_executor(executor, partial(
+            _analyze_in_process, seq, shared, translate, table, compact,
+            light))
+    status = loop.create_future()
+
+    def rebuild(job):
+        if status.cancelled():
+            return
+        if job.cancelled():
+            status.cancel()
+        elif job.exception() is not None:
+            status.set_exception(job.exception())
+        else:
+            name, pattern, length, gaps, nt_pm, aa_pm = job.result()
+            status.set_result(_make_status(
+                    (name, None if light else seq, pattern, length, gaps,
+                     nt_pm, aa_pm), reference))
+
+    def cancel(status):
+        if status.cancelled():
+            job.cancel()
+
+    job.add_done_callback(rebuild)
+    status.add_done_callback(cancel)
+    return status
+
+
+def _unlink_all(shared):
+    for reference in shared.values():
+        reference.unlink()
+    shared.clear()
+
+
+_process_reference = [None]
+
+
+def _analyze_in_process(seq, reference, translate, table, compact, light):
+    """Analyze seq in a worker process against a SharedReference.
+
+    The last reference is kept alive, so that the worker attaches to its
+    block only once. Return the data of the status without seq and stdseq,
+    see pm.parallel._make_status.
+
+    """
+
+    _process_reference[0] = reference
+    status = _analyze(seq, reference, translate, table, compact, light)
+    return (status.__status__, status.pattern, status.length, status.gaps,
+            status.nt_pm, status.aa_pm)
+
+
+__all__ = ["AsyncAnalyzer", "analyze", "analyze_many", ]
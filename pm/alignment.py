@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Memory-mapped aligned FASTA module.
+
+The alignment file is memory-mapped and the offsets of its records are
+indexed once, so record N is reached in O(1). Sequences written on a
+single line are returned as memoryview slices of the map and parsed by
+pm.pattern.parse without being copied into str. NOTE: Python 2.7 can not
+view a map, so they are returned as copied str there.
+
+Class:
+
+MappedAlignment(path)
+
+"""
+
+import mmap
+from array import array
+
+from . import _analyze
+from .reference import Reference
+
+try:
+    array('q')
+    _OFFSET_TYPE = 'q'
+except ValueError:
+    # Python 2.7
+    _OFFSET_TYPE = 'l'
+
+
+class MappedAlignment(object):
+    """Indexed, memory-mapped aligned FASTA file
+
+    Attributes:
+    path -- alignment file path
+    ids -- list of record ids, in file order
+
+    Methods:
+    __init__(self, path)
+
+    __len__(self):
+        return records number
+
+    __getitem__(self, n):
+        return (record_id, seq) of record n
+
+    seq(self, n):
+        return the sequence of record n as a memoryview slice when the
+        sequence is on one line, else as bytes
+
+    index(self, record_id):
+        return the number of record record_id
+
+    iter_analyze(self, stdseq_id, translate=True, table=1, light=False):
+        yield (record_id, status) for each record except stdseq_id
+
+    close(self)
+
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+        path -- aligned FASTA file path
+
+        """
+
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file can not be mapped
+            self._map = b''
+        self.ids = []
+        self._starts = array(_OFFSET_TYPE)
+        self._stops = array(_OFFSET_TYPE)
+        self._single_line = array('b')
+        self._id2n = None
+        self._index()
+
+    def _index(self):
+        """Index ids and sequence offsets of all records"""
+
+        buf = self._map
+        size = len(buf)
+        pos = 0 if buf[0:1] == b'>' else buf.find(b'\n>')
+        while pos != -1 and pos < size:
+            if buf[pos:pos+1] == b'\n':
+                pos += 1
+            title_stop = buf.find(b'\n', pos)
+            if title_stop == -1:
+                title_stop = size
+            title = buf[pos+1:title_stop].decode('ascii').strip()
+            next_pos = buf.find(b'\n>', title_stop)
+            stop = size if next_pos == -1 else next_pos
+            # strip trailing line breaks and spaces
+            while stop > title_stop and buf[stop-1:stop] in b'\r\n \t':
+                stop -= 1
+            self.ids.append(title.split(None, 1)[0] if title else title)
+            start = min(title_stop + 1, stop)
+            self._starts.append(start)
+            self._stops.append(stop)
+            self._single_line.append(buf.find(b'\n', start, stop) == -1)
+            pos = next_pos
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, n):
+        return self.ids[n], self.seq(n)
+
+    def __iter__(self):
+        for n in range(len(self.ids)):
+            yield self[n]
+
+    def seq(self, n):
+        """Return the sequence of record n.
+
+        Return memoryview slice of the map without copy when the sequence
+        is on one line. Multi-line sequence is joined into bytes.
+
+        """
+
+        start, stop = self._starts[n], self._stops[n]
+        if self._single_line[n]:
+            return _view(self._map, start, stop)
+        return self._map[start:stop].replace(b'\r', b'').replace(b'\n', b'')
+
+    def index(self, record_id):
+        """Return the number of record record_id. Raise KeyError if absent"""
+
+        if self._id2n is None:
+            self._id2n = dict((record_id, n)
+                              for n, record_id in enumerate(self.ids))
+        return self._id2n[record_id]
+
+    def iter_analyze(self, stdseq_id, translate=True, table=1, light=False):
+        """Analyze each record against the record stdseq_id.
+
+        Yield (record_id, status) for every record except the stdseq record.
+        Statuses keep no view of the map: in light model the sequences are
+        parsed from the map and not kept, otherwise status.seq is a str.
+
+        Args:
+        stdseq_id -- id of the standard sequence record
+
+        translate -- active translate model, default True. See pm.analyze.
+
+        table -- NCBI genetic code id or name, default 1. See pm.analyze.
+
+        light -- lightweight model, default False. See pm.analyze.
+
+        """
+
+        std_n = self.index(stdseq_id)
+        reference = Reference(bytes(self.seq(std_n)).decode('ascii'))
+        for n in range(len(self.ids)):
+            if n == std_n:
+                continue
+            seq = self.seq(n)
+            if light:
+                status = _analyze(seq, reference, translate, table,
+                                  light=True)
+                if isinstance(seq, memoryview) and hasattr(seq, 'release'):
+                    seq.release()
+            else:
+                status = _analyze(bytes(seq).decode('ascii'), reference,
+                                  translate, table)
+            yield self.ids[n], status
+
+    def close(self):
+        """Close the map and the file.
+
+        Memoryview slices returned by seq must have been released before.
+
+        """
+
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return "<pm.alignment.MappedAlignment object with: path='{}', " \
+               "records={}>".format(self.path, len(self.ids))
+
+
+def _view(buf, start, stop):
+    """Return memoryview slice of buf, copied str on Python 2.7"""
+
+    try:
+        return memoryview(buf)[start:stop]
+    except TypeError:
+        # mmap has no new-style buffer interface in Python 2.7
+        return buf[start:stop]
+
+
+__all__ = ["MappedAlignment", ]
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Memoization of PM analyzing for repeated reads.
+
+Deep-sequencing batches contain many identical reads. AnalyzeCache keeps
+the statuses of recently analyzed reads, keyed on the read, the digest of
+its stdseq and the analyzing options, and hands the same status object
+back for every duplicate.
+
+NOTE:
+    Cached status objects, and their patterns, are shared between all the
+    duplicate reads. They must be treated as immutable.
+
+Class:
+
+AnalyzeCache(maxsize=65536)
+
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from . import _analyze
+from .reference import Reference, intern
+
+
+class AnalyzeCache(object):
+    """Bounded LRU cache of PM statuses
+
+    Attributes:
+    maxsize -- max number of statuses kept, the least recently used one is
+               evicted first
+    hits -- number of analyses answered from the cache
+    misses -- number of analyses actually done
+
+    Methods:
+    __init__(self, maxsize=65536)
+
+    analyze(self, seq, stdseq, translate=True, table=1, compact=False,
+            light=False):
+        same as pm.analyze, return the cached status for a repeated read
+
+    analyze_many(self, seqs, stdseq, translate=True, table=1,
+                 compact=False, light=False):
+        same as pm.analyze_many, through the cache
+
+    clear(self)
+
+    """
+
+    def __init__(self, maxsize=65536):
+        """
+        Args:
+        maxsize -- max number of statuses kept, must be positive
+
+        """
+
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._statuses = OrderedDict()
+
+    def __len__(self):
+        return len(self._statuses)
+
+    def analyze(self, seq, stdseq, translate=True, table=1, compact=False,
+                light=False):
+        """Analyze the PM between seq and stdseq through the cache.
+
+        See pm.analyze for the arguments.
+
+        """
+
+        if not isinstance(stdseq, Reference):
+            stdseq = intern(stdseq)
+        return self._analyze(seq, stdseq, translate, table, compact, light)
+
+    def analyze_many(self, seqs, stdseq, translate=True, table=1,
+                     compact=False, light=False):
+        """Yield status of each of seqs through the cache.
+
+        See pm.analyze_many for the arguments.
+
+        """
+
+        if not isinstance(stdseq, Reference):
+            stdseq = intern(stdseq)
+        for seq in seqs:
+            yield self._analyze(seq, stdseq, translate, table, compact, light)
+
+    def _analyze(self, seq, reference, translate, table, compact, light):
+        key = (_seq_key(seq), reference.digest, translate, table,
+               compact or light, light)
+        statuses = self._statuses
+        try:
+            status = statuses[key]
+        except KeyError:
+            pass
+        else:
+            # move to the end, OrderedDict.move_to_end is Python 3 only
+            statuses[key] = statuses.pop(key)
+            self.hits += 1
+            return status
+
+        self.misses += 1
+        status = _analyze(seq, reference, translate, table, compact, light)
+        statuses[key] = status
+        if len(statuses) > self.maxsize:
+            statuses.popitem(last=False)
+        return status
+
+    def clear(self):
+        """Remove all statuses and reset the counters"""
+
+        self._statuses.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return "<pm.cache.AnalyzeCache object with: maxsize={}, size={}, " \
+               "hits={}, misses={}>".format(self.maxsize, len(self),
+                                            self.hits, self.misses)
+
+
+def _seq_key(seq):
+    """Return hashable key of str or bytes-like seq"""
+
+    if isinstance(seq, np.ndarray):
+        return seq.tobytes()
+    if isinstance(seq, (bytearray, memoryview)):
+        return bytes(seq)
+    return seq
+
+
+__all__ = ["AnalyzeCache", ]
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Chunked multi-threaded PM analyzing for very long sequences.
+
+For genome-length pairs, the work left in pm.analyze is translating the
+mutated codons and packing the mutants one by one in Python. Here the pair
+is split into codon-aligned windows, each window is upper-cased, compared
+and its mutated codons translated with NumPy, which releases the GIL, in a
+thread pool, and the window results are merged into one compact pattern
+with global positions and codon associations.
+
+Functions:
+parse(seq, stdseq, translate=False, table=1, window=DEFAULT_WINDOW,
+      workers=None)
+analyze(seq, stdseq, translate=True, table=1, light=False,
+        window=DEFAULT_WINDOW, workers=None)
+
+Const:
+
+DEFAULT_WINDOW
+default window size in bases, a multiple of 3
+
+"""
+
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+from . import _analyze, _classify
+from . import instrument as _instrument
+from .pattern import (CompactPlainPattern, CompactTranslatedPattern,
+                      _check_lengths, _count_gaps, _try_as_codes,
+                      _uint_array, _translate_codon, _translate_codons,
+                      _as_str)
+from .reference import Reference, intern
+
+
+DEFAULT_WINDOW = 3 * 2 ** 20
+
+
+def parse(seq, stdseq, translate=False, table=1, window=DEFAULT_WINDOW,
+          workers=None):
+    """Generate compact mutation pattern between long seq and stdseq.
+
+    Same pattern as pm.pattern.parse(seq, stdseq, translate, table,
+    compact=True).
+
+    Args:
+    seq -- sequence, str or ascii bytes-like object
+
+    stdseq -- pairwised standard sequence, or a pm.reference.Reference
+              object of it
+
+    translate, table -- see pm.pattern.parse
+
+    window -- bases number of a window, rounded down to a multiple of 3
+
+    workers -- threads number, default the number of CPUs
+
+    """
+
+    if not isinstance(stdseq, Reference):
+        stdseq = intern(stdseq)
+    _check_lengths(seq, stdseq._parsed_upper, translate)
+    return _parse(seq, stdseq, translate, table, window, workers)[0]
+
+
+def analyze(seq, stdseq, translate=True, table=1, light=False,
+            window=DEFAULT_WINDOW, workers=None):
+    """Analyze the PM between long pairwised seq and stdseq.
+
+    Same status as pm.analyze(seq, stdseq, translate, table, compact=True,
+    light=light), the counts being worked out from the window arrays too.
+
+    Args:
+    seq -- nucleotide sequence, str or ascii bytes-like object
+
+    stdseq -- glable pairwised standard sequence of seq, or a
+              pm.reference.Reference object of it
+
+    translate, table, light -- see pm.analyze
+
+    window, workers -- see parse
+
+    """
+
+    if not isinstance(stdseq, Reference):
+        stdseq = intern(stdseq)
+    timer = _instrument._start()
+    length = len(seq)
+    if length != stdseq.length:
+        raise ValueError("inconsistent length between seq and stdseq")
+    _check_lengths(seq, stdseq._parsed_upper, translate)
+    pattern, arrays = _parse(seq, stdseq, translate, table, window, workers)
+    if arrays is None:
+        # non-ascii sequences
+        return _analyze(seq, stdseq, translate, table, light=light)
+
+    gap = ord('-')
+    stdvariants, variants = arrays[1], arrays[2]
+    gaps = int(np.count_nonzero((stdvariants == gap) | (variants == gap)))
+    nt_pm = len(variants) - gaps
+    assert gaps == stdseq.gaps + _count_gaps(seq), \
+            "inconsistent gaps number between sequence and pattern."
+    if translate:
+        std_aa, aa = arrays[4], arrays[5]
+        aa_pm = int(np.count_nonzero((std_aa != aa) & (std_aa != gap)
+                                     & (aa != gap)))
+    else:
+        aa_pm = None
+
+    status_timer = _instrument._start()
+    status = _classify(gaps, nt_pm, aa_pm, translate)(
+            None if light else seq, pattern=pattern, length=length,
+            gaps=gaps, nt_pm=nt_pm, aa_pm=aa_pm, reference=stdseq)
+    _instrument._stop('status', status_timer)
+    _instrument._stop('analyze', timer)
+    _instrument._count('reads', 1)
+    return status
+
+
+def _parse(seq, reference, translate, table, window, workers):
+    """Return (compact pattern, merged window arrays).
+
+    Fall back to Reference.parse and return (pattern, None) when the
+    sequences are not ascii.
+
+    """
+
+    codes = _try_as_codes(seq)
+    if codes is None or reference.codes is None:
+        return reference.parse(seq, translate=translate, table=table,
+                               compact=True), None
+
+    timer = _instrument._start()
+    window = max(3, window // 3 * 3)
+    starts = range(0, len(codes), window)
+    diff = lambda start: _diff_window(codes, reference.codes, start,
+                                      start + window, translate, table)
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers == 1 or len(starts) == 1:
+        results = [diff(start) for start in starts]
+    else:
+        pool = ThreadPool(min(workers, len(starts)))
+        try:
+            results = pool.map(diff, starts)
+        finally:
+            pool.close()
+            pool.join()
+    arrays = [np.concatenate(field) for field in zip(*results)]
+    _instrument._stop('diff', timer)
+    _instrument._count('mutations', len(arrays[0]))
+
+    positions, stdvariants, variants = arrays[:3]
+    nt_positions = _uint_array(positions)
+    if not translate:
+        return CompactPlainPattern(nt_positions, stdvariants.tobytes(),
+                                   variants.tobytes()), arrays
+
+    aa_positions, std_aa, aa, assoc = arrays[3:]
+    _instrument._count('codons', len(aa_positions))
+    # codons of ambiguous bases are translated one by one, invalid ones
+    # raise TranslationError as in pm.pattern.parse
+    for i in np.flatnonzero(std_aa == 0).tolist():
+        std_aa[i] = ord(reference.aa(int(aa_positions[i]), table))
+    for i in np.flatnonzero(aa == 0).tolist():
+        start = int(aa_positions[i]) * 3 - 3
+        aa[i] = ord(_translate_codon(
+                _as_str(codes[start:start+3]).upper(), table))
+    return CompactTranslatedPattern(
+            nt_positions, stdvariants.tobytes(), variants.tobytes(),
+            _uint_array(aa_positions), std_aa.tobytes(), aa.tobytes(),
+            _uint_array(assoc)), arrays
+
+
+def _diff_window(codes, stdcodes, start, stop, translate, table):
+    """Diff codes against stdcodes in [start, stop).
+
+    Return [positions, stdvariants, variants] with 1-based global
+    positions, plus [aa_positions, std_aa, aa, assoc] in translate model.
+    start must be a multiple of 3.
+
+    """
+
+    seq = codes[start:stop]
+    lower = (seq >= 97) & (seq <= 122)
+    if lower.any():
+        seq = seq - (lower * 32).astype(np.uint8)
+    stdseq = stdcodes[start:stop]
+    idx = np.flatnonzero(seq != stdseq)
+    arrays = [idx + (start + 1), stdseq[idx], seq[idx]]
+    if not translate:
+        return arrays
+
+    codon_idx = idx // 3
+    if len(codon_idx):
+        codon_idx = codon_idx[np.r_[True, codon_idx[1:] != codon_idx[:-1]]]
+    offsets = codon_idx[:, None] * 3 + np.arange(3)
+    first_codon = start // 3 + 1
+    arrays += [codon_idx + first_codon,
+               _translate_codons(stdseq[offsets], table),
+               _translate_codons(seq[offsets], table),
+               idx // 3 + first_codon]
+    return arrays
+
+
+__all__ = ["parse", "analyze", "DEFAULT_WINDOW", ]
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Command-line entry point, bio-pm.
+
+Analyze each record of an aligned FASTA file against a reference record
+and stream one TSV or JSON Lines row per record:
+
+    bio-pm alignment.fasta REFERENCE_ID --workers 8 --format jsonl
+
+Columns: id, status, gaps, nt_pm, aa_pm, nt_mutants, aa_mutants. Mutants
+are HGVS-like strings, see pm.pattern.mutant_to_str, joined by ','.
+
+Functions:
+main(argv=None)
+
+"""
+
+import argparse
+import json
+import sys
+
+from . import __version__
+from .parallel import analyze_alignment
+from .pattern import mutants_to_str, TranslationError
+
+
+COLUMNS = ('id', 'status', 'gaps', 'nt_pm', 'aa_pm', 'nt_mutants',
+           'aa_mutants')
+
+
+def main(argv=None):
+    """Run bio-pm with command-line arguments argv, default sys.argv[1:]"""
+
+    parser = _make_parser()
+    args = parser.parse_args(argv)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        statuses = analyze_alignment(
+                args.alignment, args.reference, workers=args.workers,
+                translate=args.translate, table=args.table,
+                ordered=not args.unordered, chunksize=args.chunk_size,
+                light=True)
+        write = _write_jsonl if args.format == 'jsonl' else _write_tsv
+        if args.format == 'tsv':
+            out.write('\t'.join(COLUMNS) + '\n')
+        for record_id, status in statuses:
+            write(out, _make_row(record_id, status))
+    except KeyError as e:
+        parser.exit(1, "bio-pm: error: {}\n".format(e.args[0]))
+    except (ValueError, TranslationError) as e:
+        parser.exit(1, "bio-pm: error: {}\n".format(e))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def _make_parser():
+    parser = argparse.ArgumentParser(
+            prog='bio-pm',
+            description="Analyze point mutation status of each record in "
+                        "an aligned FASTA file against a reference record.")
+    parser.add_argument('alignment', help="aligned FASTA file")
+    parser.add_argument('reference', help="id of the reference record")
+    parser.add_argument('-o', '--output', default='-',
+                        help="output file, default stdout")
+    parser.add_argument('-f', '--format', choices=('tsv', 'jsonl'),
+                        default='tsv', help="output format, default tsv")
+    parser.add_argument('-w', '--workers', type=_positive_int, default=None,
+                        help="worker processes, default the CPU number")
+    parser.add_argument('-c', '--chunk-size', type=_positive_int, default=64,
+                        help="records sent to a worker at a time, "
+                             "default 64")
+    parser.add_argument('--translate', dest='translate', action='store_true',
+                        default=True, help="translate codons (default)")
+    parser.add_argument('--no-translate', dest='translate',
+                        action='store_false', help="compare bases only")
+    parser.add_argument('-t', '--table', type=int, default=1,
+                        help="NCBI genetic code id, default 1")
+    parser.add_argument('--unordered', action='store_true',
+                        help="write rows as soon as they are done instead "
+                             "of in the input order")
+    parser.add_argument('--version', action='version',
+                        version='%(prog)s ' + __version__)
+    return parser
+
+
+def _positive_int(value):
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError("must be a positive integer")
+    return n
+
+
+def _make_row(record_id, status):
+    """Return the row of a status as a tuple in COLUMNS order"""
+
+    pattern = status.pattern
+    nt_mutants = mutants_to_str(pattern.mutants)
+    if status.aa_pm is None:
+        aa_mutants = None
+    else:
+        aa_mutants = mutants_to_str(pattern.aa_mutants)
+    return (record_id, str(status), status.gaps, status.nt_pm, status.aa_pm,
+            nt_mutants, aa_mutants)
+
+
+def _write_tsv(out, row):
+    out.write('\t'.join('' if v is None else str(v) for v in row) + '\n')
+
+
+def _write_jsonl(out, row):
+    out.write(json.dumps(dict(zip(COLUMNS, row))) + '\n')
+
+
+if __name__ == '__main__':
+    main()
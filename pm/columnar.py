@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar export of batch PM results.
+
+Statuses and their mutants are gathered into NumPy structured arrays, one
+field per column, so that large batches can be handed to dataframes
+without a Python object per row. Parquet/Feather output needs the optional
+pyarrow package.
+
+Functions:
+to_columns(statuses)
+analyze_columns(seqs, stdseq, translate=True, table=1)
+to_arrow(array)
+write_parquet(array, path)
+write_feather(array, path)
+
+Const:
+
+STATUS_CODES
+status name to status code, ordered as the statuses: NA < PM < Conserved < Y
+
+STATUS_DTYPE
+dtype of the status table: status, score, gaps, nt_pm, aa_pm. aa_pm is -1
+when not in translate model.
+
+MUTANT_DTYPE
+dtype of the mutant table: read, nt_pos, std, var, aa_pos, std_aa, aa.
+read is the index of the status in the batch; aa_pos is 0, std_aa and aa
+are empty when not in translate model.
+
+"""
+
+import numpy as np
+
+from . import analyze_many
+from .pattern import CompactPlainPattern, CompactTranslatedPattern
+
+
+STATUS_CODES = {'NA': 0, 'PM': 1, 'Conserved': 2, 'Y': 3}
+
+STATUS_DTYPE = np.dtype([('status', 'i1'), ('score', 'f8'), ('gaps', 'i8'),
+                         ('nt_pm', 'i8'), ('aa_pm', 'i8')])
+
+MUTANT_DTYPE = np.dtype([('read', 'i8'), ('nt_pos', 'i8'), ('std', 'S1'),
+                         ('var', 'S1'), ('aa_pos', 'i8'), ('std_aa', 'S1'),
+                         ('aa', 'S1')])
+
+
+def to_columns(statuses):
+    """Gather statuses into a status table and a flat mutant table.
+
+    Return (status_array, mutant_array), structured arrays of STATUS_DTYPE
+    and MUTANT_DTYPE.
+
+    Args:
+    statuses -- iterable of status objects, e.g. pm.analyze_many(...)
+
+    """
+
+    codes, scores, counts = [], [], []
+    mutant_chunks = []
+    for read, status in enumerate(statuses):
+        codes.append(STATUS_CODES[status.__status__])
+        scores.append(status.score)
+        counts.append((status.gaps, status.nt_pm,
+                       -1 if status.aa_pm is None else status.aa_pm))
+        chunk = _mutant_chunk(read, status.pattern)
+        if chunk is not None:
+            mutant_chunks.append(chunk)
+
+    status_array = np.zeros(len(codes), dtype=STATUS_DTYPE)
+    if codes:
+        status_array['status'] = codes
+        status_array['score'] = scores
+        counts = np.array(counts, dtype='i8')
+        status_array['gaps'] = counts[:, 0]
+        status_array['nt_pm'] = counts[:, 1]
+        status_array['aa_pm'] = counts[:, 2]
+    if mutant_chunks:
+        mutant_array = np.concatenate(mutant_chunks)
+    else:
+        mutant_array = np.zeros(0, dtype=MUTANT_DTYPE)
+    return status_array, mutant_array
+
+
+def analyze_columns(seqs, stdseq, translate=True, table=1):
+    """Analyze seqs against stdseq straight into columns.
+
+    Statuses are analyzed in light model and dropped as soon as they are
+    gathered, see to_columns.
+
+    Return (status_array, mutant_array).
+
+    Args:
+    seqs -- iterable of nucleotide sequences pairwised with stdseq
+
+    stdseq -- glable pairwised standard sequence, or a
+              pm.reference.Reference object of it
+
+    translate -- active translate model, default True. See pm.analyze.
+
+    table -- NCBI genetic code id or name, default 1. See pm.analyze.
+
+    """
+
+    return to_columns(analyze_many(seqs, stdseq, translate=translate,
+                                   table=table, light=True))
+
+
+def _mutant_chunk(read, pattern):
+    """Return mutant rows of pattern as MUTANT_DTYPE array, None if none"""
+
+    if pattern is None or not len(pattern.mutants):
+        return None
+    if isinstance(pattern, (CompactPlainPattern, CompactTranslatedPattern)):
+        positions = _uint_view(pattern.positions)
+        stdvariants, variants = pattern.stdvariants, pattern.variants
+    else:
+        mutants = pattern.mutants
+        positions = np.fromiter(mutants, dtype='i8', count=len(mutants))
+        values = mutants.values()
+        stdvariants = _encode(''.join(v[0] for v in values))
+        variants = _encode(''.join(v[1] for v in values))
+
+    chunk = np.zeros(len(positions), dtype=MUTANT_DTYPE)
+    chunk['read'] = read
+    chunk['nt_pos'] = positions
+    chunk['std'] = np.frombuffer(stdvariants, dtype='S1')
+    chunk['var'] = np.frombuffer(variants, dtype='S1')
+    if not hasattr(pattern, 'aa_mutants'):
+        return chunk
+
+    if isinstance(pattern, CompactTranslatedPattern):
+        aa_positions = _uint_view(pattern.assoc)
+        aa_keys = _uint_view(pattern.aa_positions)
+        std_aa = np.frombuffer(pattern.aa_stdvariants, dtype='S1')
+        aa = np.frombuffer(pattern.aa_variants, dtype='S1')
+    else:
+        assoc_dict = pattern.assoc_dict
+        aa_positions = np.array([assoc_dict[pos] for pos in mutants],
+                                dtype='i8')
+        aa_mutants = pattern.aa_mutants
+        aa_keys = np.fromiter(aa_mutants, dtype='i8', count=len(aa_mutants))
+        aa_values = aa_mutants.values()
+        std_aa = np.frombuffer(_encode(''.join(v[0] for v in aa_values)),
+                               dtype='S1')
+        aa = np.frombuffer(_encode(''.join(v[1] for v in aa_values)),
+                           dtype='S1')
+    index = np.searchsorted(aa_keys, aa_positions)
+    chunk['aa_pos'] = aa_positions
+    chunk['std_aa'] = std_aa[index]
+    chunk['aa'] = aa[index]
+    return chunk
+
+
+def _uint_view(a):
+    """Return ndarray view of unsigned array.array a"""
+
+    return np.frombuffer(a, dtype='u{}'.format(a.itemsize))
+
+
+def _encode(s):
+    return s.encode('ascii')
+
+
+def to_arrow(array):
+    """Convert a structured array of to_columns to a pyarrow.Table.
+
+    'S1' fields become string columns. Need pyarrow.
+
+    """
+
+    pa = _import_pyarrow()
+    columns = []
+    for name in array.dtype.names:
+        column = array[name]
+        if column.dtype.kind == 'S':
+            column = np.char.decode(column, 'ascii')
+        columns.append(pa.array(column))
+    return pa.Table.from_arrays(columns, names=list(array.dtype.names))
+
+
+def write_parquet(array, path):
+    """Write a structured array of to_columns to Parquet. Need pyarrow."""
+
+    table = to_arrow(array)
+    import pyarrow.parquet as pq
+    pq.write_table(table, path)
+
+
+def write_feather(array, path):
+    """Write a structured array of to_columns to Feather. Need pyarrow."""
+
+    table = to_arrow(array)
+    import pyarrow.feather as feather
+    feather.write_feather(table, path)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("pyarrow is required for Arrow/Parquet/Feather "
+                          "output: pip install bio-pm[arrow]")
+    return pyarrow
+
+
+__all__ = ["to_columns", "analyze_columns", "to_arrow", "write_parquet",
+           "write_feather", "STATUS_CODES", "STATUS_DTYPE", "MUTANT_DTYPE", ]
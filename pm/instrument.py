@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in timing and counter instrumentation of PM analyzing.
+
+When no recorder is registered, each instrumented point costs a single
+check of an empty list. When recorders are registered, every stage of
+pm.analyze reports its wall time and the counters are increased:
+
+Stages:
+analyze -- whole pm.analyze call
+diff -- finding nucleotide mutants, see pm.pattern.parse
+translate -- translating mutated codons
+count -- counting mutants without pattern, lazy model
+status -- building the status object
+score -- scoring the status
+
+Counters:
+reads -- analyzed reads
+mutations -- nucleotide mutants found
+codons -- mutated codons translated
+
+Functions:
+register(recorder)
+unregister(recorder)
+recording(recorder=None)
+
+Class:
+
+Recorder()
+
+"""
+
+import threading
+from contextlib import contextmanager
+try:
+    from time import perf_counter as _clock
+except ImportError:
+    from timeit import default_timer as _clock
+
+
+_recorders = []
+_local = threading.local()
+
+
+class Recorder(object):
+    """Accumulate stage timings and counters
+
+    Subclass it and override on_stage/on_count to export the metrics to
+    other monitoring.
+
+    Attributes:
+    stages -- {stage: [calls, seconds], ...}
+    counters -- {name: count, ...}
+
+    Methods:
+    on_stage(self, stage, seconds)
+    on_count(self, name, n)
+    as_dict(self)
+    reset(self)
+
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+
+    def on_stage(self, stage, seconds):
+        """Called each time a stage is done"""
+
+        try:
+            item = self.stages[stage]
+        except KeyError:
+            item = self.stages[stage] = [0, 0.0]
+        item[0] += 1
+        item[1] += seconds
+
+    def on_count(self, name, n):
+        """Called each time counter name is increased by n"""
+
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def as_dict(self):
+        """Return the metrics as plain dict.
+
+        Return {'stages': {stage: {'calls': int, 'seconds': float}, ...},
+                'counters': {name: int, ...}}
+
+        """
+
+        return {'stages': dict((stage, {'calls': calls, 'seconds': seconds})
+                               for stage, (calls, seconds)
+                               in self.stages.items()),
+                'counters': dict(self.counters)}
+
+    def reset(self):
+        """Clear all the metrics"""
+
+        self.stages.clear()
+        self.counters.clear()
+
+    def __repr__(self):
+        return "<pm.instrument.Recorder object with: stages={}, " \
+               "counters={}>".format(self.stages, self.counters)
+
+
+def register(recorder):
+    """Start reporting metrics to recorder"""
+
+    if recorder not in _recorders:
+        _recorders.append(recorder)
+
+
+def unregister(recorder):
+    """Stop reporting metrics to recorder"""
+
+    if recorder in _recorders:
+        _recorders.remove(recorder)
+
+
+@contextmanager
+def recording(recorder=None):
+    """Context manager registering recorder, a new Recorder by default.
+
+    Yield the recorder.
+
+    """
+
+    if recorder is None:
+        recorder = Recorder()
+    register(recorder)
+    try:
+        yield recorder
+    finally:
+        unregister(recorder)
+
+
+def _start():
+    """Return start time of a stage, None if nothing is recording"""
+
+    return _clock() if _recorders else None
+
+
+def _stop(stage, start):
+    """Report stage started at start, see _start"""
+
+    if start is not None:
+        seconds = _clock() - start
+        for recorder in _recorders:
+            recorder.on_stage(stage, seconds)
+
+
+def _count(name, n):
+    """Increase counter name by n, unless counting is muted, see _uncounted"""
+
+    if not _recorders or getattr(_local, 'uncounted', False):
+        return
+    for recorder in _recorders:
+        recorder.on_count(name, n)
+
+
+@contextmanager
+def _uncounted():
+    """Report no counter in this thread within the block.
+
+    For work whose counters are already reported, e.g. the pattern of a
+    status analyzed in lazy model.
+
+    """
+
+    uncounted = getattr(_local, 'uncounted', False)
+    _local.uncounted = True
+    try:
+        yield
+    finally:
+        _local.uncounted = uncounted
+
+
+__all__ = ["Recorder", "register", "unregister", "recording", ]
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Analyzing reads against a panel of pairwised references.
+
+A ReferencePanel keeps a per-column consensus of its references and, for
+each column, the few references differing from it. The Hamming distance
+between a read and every reference is then worked out from the read's
+own differences to the consensus, so that only the nearest references
+are analyzed with pm.analyze.
+
+Class:
+
+ReferencePanel(stdseqs, ids=None)
+
+"""
+
+import numpy as np
+
+from . import _analyze
+from .pattern import _upper, _try_as_codes
+from .reference import Reference, intern
+
+
+class ReferencePanel(object):
+    """Panel of references pairwised with each other
+
+    All the references, and the reads analyzed against them, share one
+    pairwised coordinate, so they must have the same length.
+
+    Attributes:
+    references -- list of pm.reference.Reference objects
+    ids -- id of each reference, default its index in the panel
+    length -- length of the references
+    consensus -- uint8 array of the most common base of each column
+
+    Methods:
+    __init__(self, stdseqs, ids=None)
+
+    distances(self, seq):
+        return Hamming distances between seq and each reference
+
+    shortlist(self, seq, k=4):
+        return indexes of the k references nearest to seq
+
+    analyze(self, seq, translate=True, table=1, shortlist=4,
+            compact=False, light=False):
+        return (id, status) of the best status among the shortlist
+
+    """
+
+    def __init__(self, stdseqs, ids=None):
+        """
+        Args:
+        stdseqs -- iterable of pairwised standard sequences, or
+                   pm.reference.Reference objects of them
+        ids -- iterable of an id for each of stdseqs, default their indexes
+
+        """
+
+        self.references = [s if isinstance(s, Reference) else intern(s)
+                           for s in stdseqs]
+        if not self.references:
+            raise ValueError("empty reference panel")
+        self.ids = list(range(len(self)) if ids is None else ids)
+        if len(self.ids) != len(self):
+            raise ValueError("inconsistent number of ids and stdseqs")
+        self.length = self.references[0].length
+        if any(r.length != self.length for r in self.references):
+            raise ValueError("inconsistent length between stdseqs")
+        if any(r.codes is None for r in self.references):
+            raise ValueError("stdseqs must be ascii")
+
+        matrix = np.vstack([r.codes for r in self.references])
+        values = np.unique(matrix)
+        counts = np.vstack([np.count_nonzero(matrix == v, axis=0)
+                            for v in values])
+        self.consensus = values[np.argmax(counts, axis=0)]
+
+        # column-major postings of the references differing from consensus
+        columns, rows = np.nonzero((matrix != self.consensus).T)
+        self._refs = rows
+        self._bases = matrix[rows, columns]
+        self._offsets = np.zeros(self.length + 1, dtype=np.intp)
+        np.cumsum(np.bincount(columns, minlength=self.length),
+                  out=self._offsets[1:])
+        self._ref_diffs = np.bincount(rows, minlength=len(self))
+
+    def __len__(self):
+        return len(self.references)
+
+    def distances(self, seq):
+        """Return Hamming distances between seq and each reference.
+
+        Only the columns where seq differs from the consensus are looked
+        up. Return int array in panel order, None if seq is not ascii.
+
+        """
+
+        if len(seq) != self.length:
+            raise ValueError("inconsistent length between seq and stdseqs")
+        codes = _try_as_codes(_upper(seq))
+        if codes is None:
+            return None
+        idx = np.flatnonzero(codes != self.consensus)
+        starts = self._offsets[idx]
+        lengths = self._offsets[idx + 1] - starts
+        total = int(lengths.sum())
+        postings = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) \
+                   + np.arange(total)
+        refs = self._refs[postings]
+        same = self._bases[postings] == np.repeat(codes[idx], lengths)
+        # a column where both differ from consensus counts once if their
+        # bases differ, and not at all if they are the same
+        return (len(idx) + self._ref_diffs
+                - np.bincount(refs, minlength=len(self))
+                - np.bincount(refs[same], minlength=len(self)))
+
+    def shortlist(self, seq, k=4):
+        """Return indexes of the k references nearest to seq.
+
+        Nearest first, equal distances in panel order. All the references
+        are returned in panel order if seq is not ascii.
+
+        """
+
+        if k < 1:
+            raise ValueError("k must be a positive integer")
+        distances = self.distances(seq)
+        if distances is None:
+            return list(range(len(self)))
+        if k < len(self):
+            kth = np.partition(distances, k - 1)[k - 1]
+            candidates = np.flatnonzero(distances <= kth)
+        else:
+            candidates = np.arange(len(self))
+        order = np.argsort(distances[candidates], kind='stable')
+        return candidates[order[:k]].tolist()
+
+    def analyze(self, seq, translate=True, table=1, shortlist=4,
+                compact=False, light=False):
+        """Analyze seq against the references nearest to it.
+
+        Return (id, status) of the best status, see pm.status for the
+        order. Between equal statuses the nearer, then the former
+        reference in the panel wins.
+
+        Args:
+        seq -- nucleotide sequence pairwised with the panel
+
+        translate, table, compact, light -- see pm.analyze
+
+        shortlist -- number of nearest references analyzed, default 4
+
+        """
+
+        best = None
+        for index in self.shortlist(seq, shortlist):
+            status = _analyze(seq, self.references[index], translate, table,
+                              compact, light)
+            if best is None or status.sort_key() > best[1].sort_key():
+                best = (index, status)
+        index, status = best
+        return self.ids[index], status
+
+    def __repr__(self):
+        return "<pm.panel.ReferencePanel object with: references={}, " \
+               "length={}>".format(len(self), self.length)
+
+
+__all__ = ["ReferencePanel", ]
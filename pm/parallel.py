@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-process PM analyzing for alignment files.
+
+pm.analyze is pure Python, so a single process is limited to one core.
+This module spreads the records of an alignment file over a process pool.
+The stdseq is sent to each worker only once, when the worker starts, and
+workers send back only the data of each read.
+
+Functions:
+analyze_alignment(path, stdseq_id, workers=None, translate=True, table=1,
+                  ordered=True, chunksize=64, fmt='fasta', light=False,
+                  shared=False)
+find_stdseq(path, stdseq_id, fmt='fasta')
+
+"""
+
+import multiprocessing
+from collections import deque
+from itertools import islice
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from Bio import SeqIO
+
+from . import _analyze
+from . import status as _status
+from .reference import Reference
+
+
+def find_stdseq(path, stdseq_id, fmt='fasta'):
+    """Return the sequence string of record stdseq_id in the alignment file.
+
+    Raise KeyError if the record is not found.
+
+    """
+
+    for record in SeqIO.parse(path, fmt):
+        if record.id == stdseq_id:
+            return str(record.seq)
+    raise KeyError("stdseq record '{}' not found in {}".format(stdseq_id,
+                                                              path))
+
+
+def analyze_alignment(path, stdseq_id, workers=None, translate=True, table=1,
+                      ordered=True, chunksize=64, fmt='fasta', light=False,
+                      shared=False):
+    """Analyze the PM of each record in an alignment file against stdseq_id.
+
+    Yield (record_id, status) for every record except the stdseq record.
+
+    Args:
+    path -- alignment file path
+
+    stdseq_id -- id of the standard sequence record in the file
+
+    workers -- process number, default the number of CPUs. With workers=1
+               the records are analyzed in the current process.
+
+    translate -- active translate model, default True. See pm.analyze.
+
+    table -- NCBI genetic code id or name, default 1. See pm.analyze.
+
+    ordered -- yield in the input order if True(default), else in the
+               order that the records are done
+
+    chunksize -- records number sent to a worker each time. At most 4
+                 chunks per worker are in flight, so memory stays bounded
+                 however large the file is.
+
+    fmt -- alignment file format known by Bio.SeqIO, default 'fasta'
+
+    light -- lightweight model, default False. See pm.analyze.
+
+    shared -- place the prepared stdseq in shared memory for the workers
+              instead of sending each of them a copy, default False. See
+              pm.shared.SharedReference, it needs Python 3.8 or later.
+
+    """
+
+    stdseq = find_stdseq(path, stdseq_id, fmt)
+    reference = Reference(stdseq)
+    records = ((record.id, str(record.seq))
+               for record in SeqIO.parse(path, fmt) if record.id != stdseq_id)
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    if workers == 1:
+        # the worker state is not used here, so that generators open at the
+        # same time do not share it
+        for record_id, seq in records:
+            yield record_id, _analyze(seq, reference, translate, table,
+                                      light=light)
+        return
+
+    shared_reference = None
+    if shared:
+        from .shared import SharedReference
+        shared_reference = SharedReference.create(reference, table)
+    pool = multiprocessing.Pool(workers, initializer=_init_worker,
+                                initargs=(shared_reference or stdseq,
+                                          translate, table, light))
+    results = _pooled(pool, records, chunksize, ordered, workers * 4)
+
+    try:
+        for record_id, seq, data in results:
+            # the worker does not send seq back
+            yield record_id, _make_status(
+                    (data[0], None if light else seq) + data[1:], reference)
+    finally:
+        if shared_reference is not None:
+            results.close()
+            shared_reference.unlink()
+
+
+def _pooled(pool, records, chunksize, ordered, max_chunks):
+    """Yield (record_id, seq, status_data) of records analyzed in pool.
+
+    Records are sent in chunks and no more than max_chunks chunks are in
+    flight at a time. The pool is released afterwards.
+
+    """
+
+    pending = deque()
+    done = queue.Queue()
+    chunks = {}
+    try:
+        batches = iter(lambda: list(islice(records, chunksize)), [])
+        for number, chunk in enumerate(batches):
+            if len(pending) >= max_chunks:
+                for result in _next_done(pending, done, chunks, ordered):
+                    yield result
+            chunks[number] = chunk
+            if ordered:
+                pending.append(pool.apply_async(_analyze_records,
+                                                (number, chunk)))
+            else:
+                pending.append(pool.apply_async(_analyze_records,
+                                                (number, chunk),
+                                                callback=done.put))
+        while pending:
+            for result in _next_done(pending, done, chunks, ordered):
+                yield result
+        pool.close()
+        pool.join()
+    finally:
+        pool.terminate()
+
+
+def _next_done(pending, done, chunks, ordered):
+    """Wait for a chunk in flight, return (record_id, seq, status_data)s"""
+
+    if ordered:
+        number, ok, results = pending.popleft().get()
+    else:
+        pending.pop()
+        number, ok, results = done.get()
+    if not ok:
+        raise results
+    return [(record_id, seq, data)
+            for (record_id, seq), data in zip(chunks.pop(number), results)]
+
+
+_worker_state = {}
+
+
+def _init_worker(stdseq, translate, table, light=False):
+    """Prepare the stdseq once in each worker"""
+
+    if not isinstance(stdseq, Reference):
+        stdseq = Reference(stdseq)
+    _worker_state['reference'] = stdseq
+    _worker_state['translate'] = translate
+    _worker_state['table'] = table
+    _worker_state['light'] = light
+
+
+def _analyze_record(seq):
+    """Analyze seq in a worker.
+
+    Return the data of the status without seq and stdseq, see _make_status.
+
+    """
+
+    status = _analyze(seq, _worker_state['reference'],
+                      _worker_state['translate'], _worker_state['table'],
+                      light=_worker_state['light'])
+    return (status.__status__, status.pattern, status.length, status.gaps,
+            status.nt_pm, status.aa_pm)
+
+
+def _analyze_records(number, records):
+    """Analyze chunk number of (record_id, seq) pairs in a worker.
+
+    Return (number, True, status data list), or (number, False, exception)
+    so that errors come back through the callback, as Python 2.7 has no
+    error_callback.
+
+    """
+
+    try:
+        return number, True, [_analyze_record(seq) for _, seq in records]
+    except Exception as e:
+        return number, False, e
+
+
+def _make_status(result, reference):
+    """Rebuild status object from the data sent back by a worker"""
+
+    name, seq, pattern, length, gaps, nt_pm, aa_pm = result
+    return getattr(_status, name)(seq, pattern=pattern, length=length,
+                                  gaps=gaps, nt_pm=nt_pm, aa_pm=aa_pm,
+                                  reference=reference)
+
+
+__all__ = ["analyze_alignment", "find_stdseq", ]
@@ -3,13 +3,19 @@
 Mutation pattern analyzer for nucleotide/protein sequence
 
 Functions:
-parse(seq, stdseq, translate=False)
+parse(seq, stdseq, translate=False, table=1, compact=False)
 mutant_to_str(pos, stdvariant, variant)
+mutants_to_str(mutants, sep=',', gap_string='-')
+pattern_to_str(pattern, sep=',', assoc_sep='|', gap_string='-')
+write_patterns(patterns, handle, sep=',', assoc_sep='|', gap_string='-')
 
 Class:
 
 PlainPattern(mutants)
 TranslatedPattern(nt_mutants, aa_mutants, assoc_dict)
+CompactPlainPattern(positions, stdvariants, variants)
+CompactTranslatedPattern(positions, stdvariants, variants, 
+                         aa_positions, aa_stdvariants, aa_variants, assoc)
 
 Exception:
 
@@ -18,24 +24,50 @@ Raise when invalid codon found in seq or stdseq in translation model
 
 """
 
+from array import array
+from bisect import bisect_left
 from collections import OrderedDict
+from itertools import product
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+import numpy as np
 from Bio.Seq import translate
 from Bio.Data.CodonTable import TranslationError
 
+from . import instrument as _instrument
+
 
-def parse(seq, stdseq, translate=False):
+def parse(seq, stdseq, translate=False, table=1, compact=False):
     """Generate mutation pattern between seq and its pairwised stdseq.
     
     Return PlainPattern object if translate is False(default), else 
     return an TranslatedPattern object.
 
     Args:
-    seq -- sequence
-    stdseq -- standard sequence
+    seq -- sequence, str or ascii bytes-like object (bytes, bytearray,
+           memoryview, uint8 numpy array). bytes-like sequences are
+           parsed in place without being copied into str.
+    stdseq -- standard sequence, str or ascii bytes-like object
     translate -- translate model, whether to translate the DNA/RNA sequence.
+    table -- NCBI genetic code id or name used in translate model, default 1
+    compact -- return CompactPlainPattern/CompactTranslatedPattern which
+               store the mutants in arrays instead of dicts, default False.
+               Ignored for non-ascii sequences.
 
     """
 
+    _check_lengths(seq, stdseq, translate)
+    stdseq = _upper(stdseq)
+    return _parse(_upper(seq), stdseq, _try_as_codes(stdseq), translate,
+                  table=table, compact=compact)
+
+
+def _check_lengths(seq, stdseq, translate):
+    """Raise KeyError when seq and stdseq can not be parsed together"""
+
     seq_len = len(seq)
     if seq_len == 0:
         raise KeyError("empty sequence for seq")
@@ -44,26 +76,158 @@ def parse(seq, stdseq, translate=False):
     if translate and seq_len % 3 != 0:
         raise KeyError("sequence length must be triple in translate model")
 
-    seq = seq.upper()
-    stdseq = stdseq.upper()
-    nt_mutants = OrderedDict()
-    for i in range(0, seq_len):
-        seq_base = seq[i]
-        stdseq_base = stdseq[i]
-        if seq_base != stdseq_base:
-            nt_mutants[i+1] = (stdseq_base, seq_base)
+
+def _parse(seq, stdseq, stdcodes, translate, std_aa=None, table=1,
+           compact=False):
+    """Parse upper-cased seq against upper-cased stdseq.
+
+    Args:
+    seq, stdseq -- upper-cased sequences of checked lengths, see _upper
+    stdcodes -- uint8 codes of stdseq, or None if stdseq is not ascii
+    translate -- translate model
+    std_aa -- optional callable returning the amino acid of stdseq at a
+              given amino position, used instead of translating stdseq
+    table -- NCBI genetic code id or name
+    compact -- build compact pattern
+
+    """
+
+    start = _instrument._start()
+    if compact:
+        arrays = _diff_arrays(seq, stdseq, stdcodes)
+        if arrays is not None:
+            _instrument._stop('diff', start)
+            _instrument._count('mutations', len(arrays[0]))
+            return _make_compact_pattern(seq, stdseq, arrays, translate,
+                                         std_aa, table)
+    nt_mutants = _diff(seq, stdseq, stdcodes)
+    _instrument._stop('diff', start)
+    _instrument._count('mutations', len(nt_mutants))
     if not translate:
         return PlainPattern(nt_mutants)
 
     if not nt_mutants:
         return TranslatedPattern(nt_mutants, OrderedDict(), {})
-    aa_mutants, assoc_dict = _make_translate_mutants(seq, stdseq, nt_mutants)
+    aa_mutants, assoc_dict = _make_translate_mutants(seq, stdseq, nt_mutants,
+                                                     std_aa, table)
     return TranslatedPattern(nt_mutants, aa_mutants, assoc_dict)
 
 
-def _make_translate_mutants(seq, stdseq, nt_mutant):
+def _diff(seq, stdseq, stdcodes=None):
+    """Return nucleotide mutant dict between upper-cased seq and stdseq."""
+
+    arrays = _diff_arrays(seq, stdseq, stdcodes)
+    if arrays is None:
+        return _diff_chars(_as_str(seq), _as_str(stdseq))
+    positions, stdvariants, variants = arrays
+    return OrderedDict(zip(positions.tolist(),
+                           zip(stdvariants.decode('ascii'),
+                               variants.decode('ascii'))))
+
+
+def _diff_arrays(seq, stdseq, stdcodes=None):
+    """Return (positions, stdvariants, variants) between seq and stdseq.
+
+    Both sequences are viewed as uint8 buffers so that mismatches are found
+    by one vectorized compare instead of a Python level loop. positions is
+    an array of 1-based positions, stdvariants and variants are bytes.
+    Return None if the sequences are not ascii.
+
+    """
+
+    if stdcodes is None:
+        stdcodes = _try_as_codes(stdseq)
+    codes = _try_as_codes(seq)
+    if codes is None or stdcodes is None:
+        return None
+    idx = np.flatnonzero(codes != stdcodes)
+    return idx + 1, stdcodes[idx].tobytes(), codes[idx].tobytes()
+
+
+def _count_mutants(seq, stdseq, stdcodes=None):
+    """Return (gaps, nt_pm) between seq and stdseq without building pattern.
+
+    Return None if the sequences are not ascii.
+
+    """
+
+    if stdcodes is None:
+        stdcodes = _try_as_codes(stdseq)
+    codes = _try_as_codes(seq)
+    if codes is None or stdcodes is None:
+        return None
+    diff = codes != stdcodes
+    gap = ord('-')
+    gaps = int(np.count_nonzero(diff & ((codes == gap) | (stdcodes == gap))))
+    return gaps, int(np.count_nonzero(diff)) - gaps
+
+
+def _diff_chars(seq, stdseq):
+    """Character by character fallback of _diff for non-ascii sequences"""
+
+    nt_mutants = OrderedDict()
+    for i, (seq_base, stdseq_base) in enumerate(zip(seq, stdseq)):
+        if seq_base != stdseq_base:
+            nt_mutants[i+1] = (stdseq_base, seq_base)
+    return nt_mutants
+
+
+_BYTES_TYPES = (bytes, bytearray, memoryview, np.ndarray)
+
+
+def _upper(seq):
+    """Upper-case seq.
+
+    str is upper-cased as usual. bytes-like seq is viewed as uint8 array
+    and is copied only when it does contain lowercase letters.
+
+    """
+
+    if not isinstance(seq, _BYTES_TYPES):
+        return seq.upper()
+    codes = np.frombuffer(seq, dtype=np.uint8) \
+            if not isinstance(seq, np.ndarray) else seq
+    lower = (codes >= 97) & (codes <= 122)
+    if lower.any():
+        codes = codes - (lower * 32).astype(np.uint8)
+    return codes
+
+
+def _try_as_codes(seq):
+    """View an ascii sequence as uint8 array, None if seq is not ascii"""
+
+    if isinstance(seq, np.ndarray):
+        return seq
+    if isinstance(seq, _BYTES_TYPES):
+        return np.frombuffer(seq, dtype=np.uint8)
+    try:
+        return np.frombuffer(seq.encode('ascii'), dtype=np.uint8)
+    except UnicodeEncodeError:
+        return None
+
+
+def _as_str(seq):
+    """Return seq as str, decoding it if it is bytes-like"""
+
+    if isinstance(seq, np.ndarray):
+        return seq.tobytes().decode('ascii')
+    if isinstance(seq, _BYTES_TYPES):
+        return bytes(seq).decode('ascii')
+    return seq
+
+
+def _count_gaps(seq):
+    """Return number of gaps, '-', in str or bytes-like seq"""
+
+    if isinstance(seq, _BYTES_TYPES):
+        return int(np.count_nonzero(_try_as_codes(seq) == ord('-')))
+    return seq.count('-')
+
+
+def _make_translate_mutants(seq, stdseq, nt_mutant, std_aa=None, table=1):
     """Return (aa_mutant, nt_pos2aa_assoc_dict)"""
 
+    timer = _instrument._start()
     aa_mutant = OrderedDict()
     nt_pos2aa_assoc_dict = {}
     previous_aa_pos = -1
@@ -71,25 +235,146 @@ def _make_translate_mutants(seq, stdseq, nt_mutant):
         aa_pos, start, stop = _codon_slicing(pos)
         if aa_pos != previous_aa_pos:
             # translate codon in seq
-            codon = seq[start:stop]
-            aa = _translate_codon(codon)
+            codon = _as_str(seq[start:stop])
+            aa = _translate_codon(codon, table)
 
             # translate codon in standard sequence
-            stdcodon = stdseq[start:stop]
-            std_aa = _translate_codon(stdcodon)
+            if std_aa is None:
+                stdcodon_aa = _translate_codon(_as_str(stdseq[start:stop]),
+                                               table)
+            else:
+                stdcodon_aa = std_aa(aa_pos)
 
-            aa_mutant[aa_pos] = (std_aa, aa)
+            aa_mutant[aa_pos] = (stdcodon_aa, aa)
         previous_aa_pos = aa_pos
         nt_pos2aa_assoc_dict[pos] = aa_pos
+    _instrument._stop('translate', timer)
+    _instrument._count('codons', len(aa_mutant))
     return (aa_mutant, nt_pos2aa_assoc_dict)
 
 
-def _translate_codon(codon):
+def _translate_codon(codon, table=1):
     """used by _make_translate_mutants"""
 
     if '-' in codon:
         return '-'
-    return translate(codon)
+    lookup = _codon_lookup(table)
+    try:
+        return lookup[codon]
+    except KeyError:
+        # ambiguous codon, translate and remember it. Invalid codon raises
+        # TranslationError here just like Bio.Seq.translate does.
+        aa = lookup[codon] = translate(codon, table=table)
+        return aa
+
+
+_CODON_LOOKUPS = {}
+
+
+def _codon_lookup(table):
+    """Return codon to amino acid dict of the genetic code table.
+
+    The dict is built once per table, covering all 64 codons with both T
+    and U. Ambiguous codons are added on the first time they are met.
+
+    """
+
+    try:
+        return _CODON_LOOKUPS[table]
+    except KeyError:
+        pass
+    lookup = {}
+    for bases in product('ACGTU', repeat=3):
+        codon = ''.join(bases)
+        lookup[codon] = translate(codon, table=table)
+    _CODON_LOOKUPS[table] = lookup
+    return lookup
+
+
+_BASE_INDEX = np.full(256, 4, dtype=np.uint8)
+for _i, _bases in enumerate(('A', 'C', 'G', 'TU')):
+    for _base in _bases:
+        _BASE_INDEX[ord(_base)] = _i
+
+_CODON_CODE_LOOKUPS = {}
+
+
+def _translate_codons(codons, table=1):
+    """Translate a (n, 3) uint8 array of upper-cased codons at once.
+
+    Return uint8 array of amino acid codes. Codons with a gap are '-', and
+    codons of ambiguous or invalid bases are 0, to be translated one by
+    one with _translate_codon.
+
+    """
+
+    try:
+        lookup = _CODON_CODE_LOOKUPS[table]
+    except KeyError:
+        # index of codon b0 b1 b2 is b0*25 + b1*5 + b2, base 4 is not ACGTU
+        lookup = np.zeros(125, dtype=np.uint8)
+        for (i, b0), (j, b1), (k, b2) in product(enumerate('ACGT'), 
+                                                 repeat=3):
+            lookup[i*25 + j*5 + k] = ord(_translate_codon(b0 + b1 + b2,
+                                                          table))
+        _CODON_CODE_LOOKUPS[table] = lookup
+    index = _BASE_INDEX[codons].astype(np.intp)
+    aa_codes = lookup[index[:, 0] * 25 + index[:, 1] * 5 + index[:, 2]]
+    aa_codes[(codons == ord('-')).any(axis=1)] = ord('-')
+    return aa_codes
+
+
+def _make_compact_pattern(seq, stdseq, arrays, translate, std_aa, table):
+    """Build compact pattern from the arrays returned by _diff_arrays"""
+
+    positions, stdvariants, variants = arrays
+    nt_positions = _uint_array(positions)
+    if not translate:
+        return CompactPlainPattern(nt_positions, stdvariants, variants)
+
+    aa_mutant, assoc_dict = _make_translate_mutants(
+            seq, stdseq, nt_positions, std_aa, table)
+    return _pack_translated(nt_positions, stdvariants, variants, aa_mutant,
+                            assoc_dict)
+
+
+def _pack_translated(nt_positions, stdvariants, variants, aa_mutant,
+                     assoc_dict):
+    """Build CompactTranslatedPattern from packed nucleotide mutants and
+    amino mutant dicts"""
+
+    aa_values = aa_mutant.values()
+    return CompactTranslatedPattern(
+            nt_positions, stdvariants, variants, 
+            array('I', aa_mutant),
+            ''.join(v[0] for v in aa_values).encode('ascii'),
+            ''.join(v[1] for v in aa_values).encode('ascii'),
+            array('I', [assoc_dict[pos] for pos in nt_positions]))
+
+
+def _pack(mutants, aa_mutant=None, assoc_dict=None):
+    """Build compact pattern from mutant dicts, translated if aa_mutant is
+    given"""
+
+    values = mutants.values()
+    nt_positions = array('I', mutants)
+    stdvariants = ''.join(v[0] for v in values).encode('ascii')
+    variants = ''.join(v[1] for v in values).encode('ascii')
+    if aa_mutant is None:
+        return CompactPlainPattern(nt_positions, stdvariants, variants)
+    return _pack_translated(nt_positions, stdvariants, variants, aa_mutant,
+                            assoc_dict)
+
+
+def _uint_array(positions):
+    """Convert numpy positions to array('I')"""
+
+    a = array('I')
+    # array.frombytes is fromstring in Python 2.7
+    frombytes = getattr(a, 'frombytes', None) or a.fromstring
+    frombytes(np.asarray(positions, dtype='u{}'.format(a.itemsize))
+              .tobytes())
+    return a
 
 
 def _codon_slicing(nt_pos):
@@ -134,6 +419,84 @@ def mutant_to_str(pos, stdvariant, variant, gap_string='-'):
     return mut
 
 
+def mutants_to_str(mutants, sep=',', gap_string='-'):
+    """Render a whole mutant dict to one HGVS-like string.
+
+    Same as joining mutant_to_str of each mutant with sep, e.g.
+    {109: (A, G), 200: (T, -)} -> '109A>G,200delT'
+
+    Args:
+    mutants -- {position: (stdvariant, variant), ...}, e.g. pattern.mutants
+               or pattern.aa_mutants
+    sep -- separator between mutants, default ','
+    gap_string -- a string represent a gap, default '-'
+
+    """
+
+    return sep.join([_mutant_str(str(pos), stdv, v, gap_string)
+                     for pos, (stdv, v) in mutants.items()])
+
+
+def pattern_to_str(pattern, sep=',', assoc_sep='|', gap_string='-'):
+    """Render a whole pattern to one HGVS-like string.
+
+    For PlainPattern, same as mutants_to_str(pattern.mutants). For 
+    TranslatedPattern, each nucleotide mutant is followed by its amino
+    mutant, e.g. '8C>A|3A>D,9T>G|3A>D'. Each amino mutant is rendered only
+    once however many nucleotide mutants its codon holds.
+
+    Args:
+    pattern -- pattern object
+    sep -- separator between mutants, default ','
+    assoc_sep -- separator between nucleotide and amino mutant, default '|'
+    gap_string -- a string represent a gap, default '-'
+
+    """
+
+    if not hasattr(pattern, 'aa_mutants'):
+        return mutants_to_str(pattern.mutants, sep, gap_string)
+    aa_strs = dict((aa_pos, assoc_sep + _mutant_str(str(aa_pos), stdv, v,
+                                                    gap_string))
+                   for aa_pos, (stdv, v) in pattern.aa_mutants.items())
+    if isinstance(pattern, CompactTranslatedPattern):
+        assoc = pattern.assoc
+    else:
+        assoc_dict = pattern.assoc_dict
+        assoc = [assoc_dict[pos] for pos in pattern.mutants]
+    return sep.join([_mutant_str(str(pos), stdv, v, gap_string) 
+                     + aa_strs[aa_pos]
+                     for (pos, (stdv, v)), aa_pos 
+                     in zip(pattern.mutants.items(), assoc)])
+
+
+def write_patterns(patterns, handle, sep=',', assoc_sep='|', gap_string='-'):
+    """Write each of patterns as a line of pattern_to_str to handle.
+
+    Args:
+    patterns -- iterable of pattern objects
+    handle -- text file-like object
+    sep, assoc_sep, gap_string -- see pattern_to_str
+
+    """
+
+    write = handle.write
+    for pattern in patterns:
+        write(pattern_to_str(pattern, sep, assoc_sep, gap_string))
+        write('\n')
+
+
+def _mutant_str(pos, stdvariant, variant, gap_string):
+    """mutant_to_str for str position, used by the bulk renderers"""
+
+    if stdvariant == variant:
+        return pos + stdvariant + '=' + variant
+    if stdvariant == gap_string:
+        return pos + 'ins' + variant
+    if variant == gap_string:
+        return pos + 'del' + stdvariant
+    return pos + stdvariant + '>' + variant
+
+
 class TranslatedPattern(object):
     """Translated mutation pattern data model
 
@@ -230,4 +593,197 @@ class PlainPattern(object):
         return self._list
 
 
+class _MutantsView(Mapping):
+    """Read-only {position: (stdvariant, variant)} view over arrays"""
+
+    __slots__ = ('_positions', '_stdvariants', '_variants')
+
+    def __init__(self, positions, stdvariants, variants):
+        self._positions = positions
+        self._stdvariants = stdvariants
+        self._variants = variants
+
+    def _index(self, pos):
+        i = bisect_left(self._positions, pos)
+        if i == len(self._positions) or self._positions[i] != pos:
+            raise KeyError(pos)
+        return i
+
+    def __getitem__(self, pos):
+        i = self._index(pos)
+        return (self._stdvariants[i:i+1].decode('ascii'),
+                self._variants[i:i+1].decode('ascii'))
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def values(self):
+        return list(zip(self._stdvariants.decode('ascii'),
+                        self._variants.decode('ascii')))
+
+    def items(self):
+        return list(zip(self._positions, self.values()))
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, self.items())
+
+
+class _AssocView(Mapping):
+    """Read-only {nt_position: aa_position} view over arrays"""
+
+    __slots__ = ('_positions', '_aa_positions')
+
+    def __init__(self, positions, aa_positions):
+        self._positions = positions
+        self._aa_positions = aa_positions
+
+    def __getitem__(self, pos):
+        i = bisect_left(self._positions, pos)
+        if i == len(self._positions) or self._positions[i] != pos:
+            raise KeyError(pos)
+        return self._aa_positions[i]
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def items(self):
+        return list(zip(self._positions, self._aa_positions))
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, self.items())
+
+
+class CompactPlainPattern(object):
+    """Array backed non translated mutation pattern data model
+
+    Same interface as PlainPattern with a much smaller memory footprint.
+    The mutants are kept in a position array('I') and two parallel bytes
+    of variants.
+
+    Attributes:
+    mutants -- read-only view {position: (variant_standard, variant), ...}
+
+    Methods:
+    __init__(self, positions, stdvariants, variants)
+
+    list(self):
+        return [(pos, stdvariant, variant), ...]
+
+    """
+
+    __slots__ = ('positions', 'stdvariants', 'variants')
+
+    def __init__(self, positions, stdvariants, variants):
+        """
+        Args:
+        positions -- ascending array('I') of mutant positions
+        stdvariants -- bytes of variants in stdseq, one per position
+        variants -- bytes of variants in seq, one per position
+
+        """
+
+        self.positions = positions
+        self.stdvariants = stdvariants
+        self.variants = variants
+
+    @property
+    def mutants(self):
+        return _MutantsView(self.positions, self.stdvariants, self.variants)
+
+    def list(self):
+        """Convert the pattern to flat list.
+
+        Return [(pos, stdvariant, variant), ...]
+
+        """
+
+        return list(zip(self.positions, self.stdvariants.decode('ascii'),
+                        self.variants.decode('ascii')))
+
+
+class CompactTranslatedPattern(object):
+    """Array backed translated mutation pattern data model
+
+    Same interface as TranslatedPattern with a much smaller memory
+    footprint. Nucleotide and amino acid mutants are both kept in a
+    position array('I') and two parallel bytes of variants, and assoc
+    keeps the amino position of each nucleotide mutant.
+
+    Attributes:
+    mutants -- read-only view {position: (variant_in_stdseq, 
+               variant_in_seq), ...}
+    aa_mutants -- read-only view {position: (variant_in_stdseq, 
+                  variant_in_seq), ...}
+    assoc_dict -- read-only view {nt_position: aa_position, ...}
+
+    Methods:
+    __init__(self, positions, stdvariants, variants, 
+             aa_positions, aa_stdvariants, aa_variants, assoc)
+
+    list(self):
+        return [
+                ((nt_pos, stdvariant, variant), (aa_pos, stdvariant, variant)), 
+                ...
+               ]
+
+    """
+
+    __slots__ = ('positions', 'stdvariants', 'variants', 
+                 'aa_positions', 'aa_stdvariants', 'aa_variants', 'assoc')
+
+    def __init__(self, positions, stdvariants, variants, 
+                 aa_positions, aa_stdvariants, aa_variants, assoc):
+        """
+        Args:
+        positions, stdvariants, variants -- nucleotide mutants, see
+                                            CompactPlainPattern
+        aa_positions, aa_stdvariants, aa_variants -- amino mutants
+        assoc -- array('I') of amino position for each nucleotide mutant
+
+        """
+
+        self.positions = positions
+        self.stdvariants = stdvariants
+        self.variants = variants
+        self.aa_positions = aa_positions
+        self.aa_stdvariants = aa_stdvariants
+        self.aa_variants = aa_variants
+        self.assoc = assoc
+
+    @property
+    def mutants(self):
+        return _MutantsView(self.positions, self.stdvariants, self.variants)
+
+    @property
+    def aa_mutants(self):
+        return _MutantsView(self.aa_positions, self.aa_stdvariants, 
+                            self.aa_variants)
+
+    @property
+    def assoc_dict(self):
+        return _AssocView(self.positions, self.assoc)
+
+    def list(self):
+        """Convert the pattern to flat list.
+
+        Return [
+                ((nt_pos, stdvariant, variant), (aa_pos, stdvariant, variant)), 
+                ...
+               ]
+
+        """
+
+        aa_mutants = self.aa_mutants
+        return [((nt_pos, stdv, v), (aa_pos,) + aa_mutants[aa_pos])
+                for nt_pos, stdv, v, aa_pos in zip(
+                    self.positions, self.stdvariants.decode('ascii'),
+                    self.variants.decode('ascii'), self.assoc)]
+
+
 __all__ = [parse, mutant_to_str, ]
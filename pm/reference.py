@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Pre-processed standard sequence module.
+
+Analyzing many sequences against one stdseq repeats the same work on the
+stdseq for every call: upper-casing, counting and removing its gaps and
+translating its codons. A Reference object does that work once and can be
+passed to pm.analyze/pm.analyze_many in place of the stdseq string.
+
+Functions:
+intern(stdseq)
+fingerprint(stdseq_without_gaps)
+
+Class:
+
+Reference(stdseq)
+
+"""
+
+import hashlib
+import weakref
+from collections import OrderedDict
+from functools import partial
+
+import numpy as np
+
+from . import instrument as _instrument
+from .pattern import (_check_lengths, _parse, _upper, _try_as_codes, _as_str,
+                      _codon_slicing, _translate_codon)
+
+
+class Reference(object):
+    """Standard sequence prepared for repeated analyzing
+
+    Attributes:
+    stdseq -- the original standard sequence (might be gaps contained)
+    upper -- upper-cased stdseq
+    codes -- uint8 array view of upper, None if stdseq is not ascii
+    length -- length of stdseq
+    gaps -- gaps number in stdseq
+    stdseq_without_gaps -- upper-cased stdseq with gaps removed
+    fingerprint -- fingerprint of stdseq_without_gaps, see fingerprint
+    digest -- SHA-1 digest of upper, identifying the gapped stdseq
+
+    Methods:
+    __init__(self, stdseq)
+
+    aa(self, aa_pos, table=1):
+        return amino acid translated from the codon at aa_pos
+
+    parse(self, seq, translate=False, table=1, compact=False):
+        return mutation pattern between seq and this reference
+
+    count(self, seq, translate=False, table=1):
+        return (gaps, nt_pm, aa_pm) between seq and this reference
+
+    """
+
+    def __init__(self, stdseq):
+        """
+        Args:
+        stdseq -- standard sequence
+
+        """
+
+        self.stdseq = stdseq
+        self.upper = stdseq.upper()
+        self.codes = _try_as_codes(self.upper)
+        self.length = len(stdseq)
+        self.gaps = self.upper.count('-')
+        self._stdseq_without_gaps = None
+        self._fingerprint = None
+        self._digest = None
+        self._aa = {}
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def stdseq_without_gaps(self):
+        """Upper-cased stdseq with gaps removed, computed once"""
+
+        if self._stdseq_without_gaps is None:
+            self._stdseq_without_gaps = self.upper.replace('-', '')
+        return self._stdseq_without_gaps
+
+    @property
+    def fingerprint(self):
+        """Fingerprint of stdseq_without_gaps, computed once"""
+
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint(self.stdseq_without_gaps)
+        return self._fingerprint
+
+    @property
+    def digest(self):
+        """SHA-1 digest of upper, computed once.
+
+        Unlike fingerprint, it tells apart stdseqs whose gaps are placed
+        differently, so that it can key analyzing results.
+
+        """
+
+        if self._digest is None:
+            self._digest = fingerprint(self.upper)
+        return self._digest
+
+    @property
+    def _parsed_upper(self):
+        """upper-cased stdseq as it is parsed against, see SharedReference"""
+
+        return self.upper
+
+    def aa(self, aa_pos, table=1):
+        """Return amino acid translated from the codon at aa_pos.
+
+        Each codon is translated at most once per genetic code table. Raise
+        TranslationError when the codon is invalid.
+
+        """
+
+        try:
+            return self._aa[table, aa_pos]
+        except KeyError:
+            pass
+        _, start, stop = _codon_slicing(aa_pos * 3)
+        aa = self._aa[table, aa_pos] = _translate_codon(
+                self.upper[start:stop], table)
+        return aa
+
+    def parse(self, seq, translate=False, table=1, compact=False):
+        """Generate mutation pattern between seq and this reference.
+
+        Same as pm.pattern.parse(seq, self.stdseq, translate, table, compact)
+        while reusing the prepared stdseq.
+
+        """
+
+        upper = self._parsed_upper
+        _check_lengths(seq, upper, translate)
+        return _parse(_upper(seq), upper, self.codes, translate,
+                      std_aa=partial(self.aa, table=table), table=table,
+                      compact=compact)
+
+    def count(self, seq, translate=False, table=1):
+        """Count the mutants between seq and this reference.
+
+        The counts are the same as those of pm.analyze, but no pattern is
+        built: mismatches are counted by one vectorized compare and only
+        the codons containing them are translated.
+
+        Return (gaps, nt_pm, aa_pm), aa_pm is None if translate is False.
+        Return None if seq or stdseq is not ascii.
+
+        """
+
+        _check_lengths(seq, self._parsed_upper, translate)
+        timer = _instrument._start()
+        seq = _upper(seq)
+        codes = _try_as_codes(seq)
+        if codes is None or self.codes is None:
+            return None
+        idx = np.flatnonzero(codes != self.codes)
+        gap = ord('-')
+        gaps = int(np.count_nonzero((codes[idx] == gap) 
+                                    | (self.codes[idx] == gap)))
+        nt_pm = len(idx) - gaps
+        # the same check as pm.analyze, a gap in both seq and stdseq is not
+        # counted
+        assert gaps == self.gaps + int(np.count_nonzero(codes == gap)), \
+                "inconsistent gaps number between sequence and pattern."
+        _instrument._count('mutations', len(idx))
+        if not translate:
+            _instrument._stop('count', timer)
+            return gaps, nt_pm, None
+
+        aa_pm = 0
+        aa_positions = np.unique(idx // 3 + 1).tolist()
+        for aa_pos in aa_positions:
+            start = aa_pos * 3 - 3
+            aa = _translate_codon(_as_str(seq[start:start+3]), table)
+            std_aa = self.aa(aa_pos, table)
+            if aa != std_aa and aa != '-' and std_aa != '-':
+                aa_pm += 1
+        _instrument._stop('count', timer)
+        _instrument._count('codons', len(aa_positions))
+        return gaps, nt_pm, aa_pm
+
+    def __repr__(self):
+        if self.length > 60:
+            s = self.stdseq[0:27] + "..." + self.stdseq[-27:]
+        else:
+            s = self.stdseq
+        return "<pm.reference.Reference object with: length={}, gaps={}, " \
+               "stdseq='{}'>".format(self.length, self.gaps, s)
+
+
+def fingerprint(stdseq_without_gaps):
+    """Return fingerprint of an upper-cased, gaps-removed stdseq.
+
+    Statuses are orderable only when their stdseqs are consistent. The
+    fingerprint, a SHA-1 digest, lets them check that in O(1) instead of
+    comparing the whole stdseqs.
+
+    """
+
+    return hashlib.sha1(stdseq_without_gaps.encode('utf-8')).digest()
+
+
+_interned = weakref.WeakValueDictionary()
+
+# the last prepared references are kept alive, so that calls building no
+# status, e.g. pm.classify, do not prepare the stdseq each time
+_recent = OrderedDict()
+_RECENT_SIZE = 4
+
+
+def intern(stdseq):
+    """Return the shared Reference object of stdseq.
+
+    The same Reference object is returned for equal stdseq strings as long
+    as it is alive, so that statuses analyzed separately against one stdseq
+    share one handle of it instead of their own copies. The last few
+    references returned are kept alive.
+
+    """
+
+    try:
+        reference = _interned[stdseq]
+    except KeyError:
+        reference = Reference(stdseq)
+        # keyed by reference.stdseq so that the key is not an extra copy
+        reference = _interned.setdefault(reference.stdseq, reference)
+    _recent.pop(reference.stdseq, None)
+    _recent[reference.stdseq] = reference
+    if len(_recent) > _RECENT_SIZE:
+        _recent.popitem(last=False)
+    return reference
+
+
+__all__ = ["Reference", "intern", ]
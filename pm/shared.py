@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Reference placed in shared memory for worker processes.
+
+A pm.reference.Reference sent to worker processes is pickled, and each
+worker holds its own copy of the stdseq, its gaps-removed copy and its
+translation. A SharedReference keeps them in one
+multiprocessing.shared_memory block instead. Pickling it sends only the
+block name, and workers attach to the block by name, so the reference
+costs the same memory whatever the number of workers.
+
+    with SharedReference.create(stdseq) as reference:
+        with ProcessPoolExecutor(32) as executor:
+            executor.map(partial(pm.analyze, stdseq=reference), seqs)
+
+NOTE:
+    This module needs Python 3.8 or later. Only the process creating the
+    block removes it, on unlink() or leaving the with block; attached
+    processes only close() it. Reading a closed SharedReference, or the
+    stdseq of a status built against it, raises ValueError.
+
+Class:
+
+SharedReference
+
+"""
+
+import struct
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .pattern import _codon_slicing, _translate_codon, _translate_codons, \
+                     _as_str, _upper, _try_as_codes
+from .reference import Reference, fingerprint
+
+
+# magic, length, gaps, table, fingerprint of stdseq_without_gaps, digest of
+# upper
+_HEADER = struct.Struct('<4sQQ32s20s20s')
+_MAGIC = b'PMSR'
+
+
+class SharedReference(Reference):
+    """Reference whose prepared data live in shared memory
+
+    Same interface as pm.reference.Reference, but codes is a uint8 array
+    over the shared block, and stdseq, upper and stdseq_without_gaps are
+    decoded from it on each access. Reads are parsed against codes.
+
+    Attributes:
+    name -- name of the shared memory block
+    table -- NCBI genetic code id or name the codons are translated with
+    codes -- uint8 array of upper-cased stdseq
+    upper -- upper-cased stdseq, the same as stdseq
+    gapless -- uint8 array of upper-cased stdseq without gaps
+    length, gaps, fingerprint, digest -- see pm.reference.Reference
+
+    Methods:
+    create(cls, stdseq, table=1):
+        return a new SharedReference of stdseq, classmethod
+
+    attach(cls, name):
+        return the SharedReference of block name, classmethod
+
+    close(self)
+
+    unlink(self)
+
+    """
+
+    def __init__(self, shm, owner=False):
+        """Use create or attach instead"""
+
+        magic, length, gaps, table, fp, digest = \
+            _HEADER.unpack_from(shm.buf)
+        if magic != _MAGIC:
+            raise ValueError("shared memory '{}' is not a "
+                             "SharedReference".format(shm.name))
+        self._shm = shm
+        self._owner = owner
+        self.name = shm.name
+        self.length = length
+        self.gaps = gaps
+        table = table.rstrip(b'\0').decode('ascii')
+        self.table = int(table) if table.isdigit() else table
+        self._fingerprint = fp
+        self._digest = digest
+        offset = _HEADER.size
+        self._codes = self._view(offset, length)
+        offset += length
+        self._gapless = self._view(offset, length - gaps)
+        offset += length - gaps
+        self._aa_codes = self._view(offset, length // 3)
+        self._aa = {}
+
+    def _view(self, offset, size):
+        return np.frombuffer(self._shm.buf, dtype=np.uint8, count=size,
+                             offset=offset)
+
+    @classmethod
+    def create(cls, stdseq, table=1):
+        """Place stdseq in a new shared memory block.
+
+        The codons are translated once with genetic code table. The caller
+        owns the block and must unlink it, see unlink.
+
+        Args:
+        stdseq -- ascii standard sequence, or a pm.reference.Reference
+                  object of it
+        table -- NCBI genetic code id or name, default 1
+
+        """
+
+        if isinstance(stdseq, Reference):
+            stdseq = stdseq.upper
+        upper = _upper(stdseq)
+        codes = _try_as_codes(upper)
+        if codes is None:
+            raise ValueError("stdseq must be ascii")
+        gapless = codes[codes != ord('-')]
+        aa_codes = _translate_codons(
+                codes[:len(codes) // 3 * 3].reshape(-1, 3), table)
+        length = len(codes)
+        shm = shared_memory.SharedMemory(
+                create=True, size=max(1, _HEADER.size + length + len(gapless)
+                                         + len(aa_codes)))
+        try:
+            _HEADER.pack_into(shm.buf, 0, _MAGIC, length,
+                              length - len(gapless),
+                              str(table).encode('ascii'),
+                              fingerprint(_as_str(gapless)),
+                              fingerprint(_as_str(codes)))
+            offset = _HEADER.size
+            for data in (codes, gapless, aa_codes):
+                shm.buf[offset:offset+len(data)] = data.tobytes()
+                offset += len(data)
+            reference = cls(shm, owner=True)
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        _attached[reference.name] = reference
+        return reference
+
+    @classmethod
+    def attach(cls, name):
+        """Return the SharedReference of the shared memory block name.
+
+        A process attaches to a block only once as long as the returned
+        object is alive.
+
+        """
+
+        try:
+            return _attached[name]
+        except KeyError:
+            pass
+        return _attached.setdefault(name, cls(_attach_shm(name)))
+
+    def __reduce__(self):
+        return (SharedReference.attach, (self.name, ))
+
+    def _check_open(self):
+        if self._shm is None:
+            raise ValueError("shared memory '{}' is closed".format(self.name))
+
+    @property
+    def codes(self):
+        """uint8 array of upper-cased stdseq over the shared block"""
+
+        self._check_open()
+        return self._codes
+
+    _parsed_upper = codes
+
+    @property
+    def gapless(self):
+        """uint8 array of upper-cased stdseq without gaps"""
+
+        self._check_open()
+        return self._gapless
+
+    @property
+    def stdseq(self):
+        """Upper-cased stdseq, decoded from shared memory on each access"""
+
+        return _as_str(self.codes)
+
+    upper = stdseq
+
+    @property
+    def stdseq_without_gaps(self):
+        """stdseq with gaps removed, decoded on each access"""
+
+        return _as_str(self.gapless)
+
+    @property
+    def fingerprint(self):
+        return self._fingerprint
+
+    @property
+    def digest(self):
+        return self._digest
+
+    def aa(self, aa_pos, table=1):
+        """Return amino acid translated from the codon at aa_pos.
+
+        Codons of self.table are read from shared memory, other codons are
+        translated and kept in this process, see Reference.aa.
+
+        """
+
+        self._check_open()
+        if table == self.table and 0 < aa_pos <= len(self._aa_codes):
+            code = self._aa_codes[aa_pos-1]
+            if code:
+                return chr(code)
+        try:
+            return self._aa[table, aa_pos]
+        except KeyError:
+            pass
+        _, start, stop = _codon_slicing(aa_pos * 3)
+        aa = self._aa[table, aa_pos] = _translate_codon(
+                _as_str(self.codes[start:stop]), table)
+        return aa
+
+    def close(self):
+        """Detach this process from the shared memory block"""
+
+        if self._shm is None:
+            return
+        _attached.pop(self.name, None)
+        self._codes = self._gapless = self._aa_codes = None
+        self._shm.close()
+        self._shm = None
+
+    def unlink(self):
+        """Close and remove the shared memory block, by its creator only"""
+
+        shm = self._shm
+        self.close()
+        if self._owner:
+            (shm or shared_memory.SharedMemory(name=self.name)).unlink()
+            self._owner = False
+
+    def __del__(self):
+        # release the views before the block, which would otherwise fail to
+        # close when garbage collected
+        if getattr(self, '_shm', None) is None:
+            return
+        try:
+            self.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unlink()
+
+    def __repr__(self):
+        return "<pm.shared.SharedReference object with: name='{}', " \
+               "length={}, gaps={}>".format(self.name, self.length, self.gaps)
+
+
+_attached = weakref.WeakValueDictionary()
+
+def _attach_shm(name):
+    """Attach to block name without letting this process remove it"""
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # before Python 3.13, the resource tracker would remove the block when
+    # an attached process exits. A multiprocessing child shares the tracker
+    # of its parent, where the block is registered once, so unregistering
+    # it there would drop the entry of the creator.
+    import multiprocessing
+    from multiprocessing import resource_tracker
+    shm = shared_memory.SharedMemory(name=name)
+    if multiprocessing.parent_process() is None:
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+    return shm
+
+
+__all__ = ["SharedReference", ]
@@ -11,6 +11,12 @@ NOTE:
     the orignal stdseq as the stdseq to compare. So status with 
     stdseq='ATG-AAT' and status with stdseq='ATGAAT' is comparable.
 
+Functions:
+
+score(status, gaps=0, nt_pm=0, aa_pm=None)
+sort_key(status, gaps=0, nt_pm=0, aa_pm=None)
+rank(statuses, k=None)
+
 Class:
 
 Y
@@ -21,14 +27,21 @@ NA
 Const:
 
 SCORE_MATIX
-matix used to calculate score of status, see NA._score(self)
+matix used to calculate score of status, see score
 
 MAX_BASE
-max length of sequence allowed. If the real sequence length is excess, then
-the order of the status might be wrong.
+scale of the counts in score. Scores are rounded floats, statuses are
+compared by their exact sort keys instead, see sort_key.
 
 """
 
+from fractions import Fraction
+
+import numpy as np
+
+from . import instrument as _instrument
+from .reference import fingerprint
+
 SCORE_MATIX = {'Y': 6.0, 
                'Conserved': 4.0, 
                'PM': 2.0, 
@@ -40,21 +53,175 @@ SCORE_MATIX = {'Y': 6.0,
 MAX_BASE = 10000000
 
 
+def score(status, gaps=0, nt_pm=0, aa_pm=None):
+    """Calculate score of a status from its counts.
+
+    Args:
+    status -- status name, 'Y'/'Conserved'/'PM'/'NA'
+    gaps, nt_pm, aa_pm -- see NA
+
+    """
+
+    gap = 1 if gaps > 0 else 0
+    aa_pm = MAX_BASE if aa_pm is None else aa_pm
+    return SCORE_MATIX[status] \
+            + SCORE_MATIX['gaps'] * gap \
+            + SCORE_MATIX['nt_pm'] * nt_pm / MAX_BASE \
+            + SCORE_MATIX['aa_pm'] * aa_pm / MAX_BASE
+
+
+_COUNT_WEIGHTS = {}
+
+
+def _count_weights():
+    """Return integer weights of (nt_pm, aa_pm) in the ratio of
+    SCORE_MATIX"""
+
+    weights = (SCORE_MATIX['nt_pm'], SCORE_MATIX['aa_pm'])
+    try:
+        return _COUNT_WEIGHTS[weights]
+    except KeyError:
+        pass
+    nt, aa = [Fraction(w).limit_denominator() for w in weights]
+    scale = nt.denominator * aa.denominator
+    _COUNT_WEIGHTS[weights] = int(nt * scale), int(aa * scale)
+    return _COUNT_WEIGHTS[weights]
+
+
+def sort_key(status, gaps=0, nt_pm=0, aa_pm=None):
+    """Calculate exact sort key of a status from its counts.
+
+    Keys order as scores do, see score, but the counts are kept as an
+    exact integer instead of a fraction of MAX_BASE, so that the order
+    holds whatever the counts are.
+
+    Return (status_score, counts_score): status_score is the float score
+    of the status name and the gaps penalty, counts_score is an int.
+
+    Args:
+    status -- status name, 'Y'/'Conserved'/'PM'/'NA'
+    gaps, nt_pm, aa_pm -- see NA
+
+    """
+
+    nt_weight, aa_weight = _count_weights()
+    gap = 1 if gaps > 0 else 0
+    aa_pm = MAX_BASE if aa_pm is None else aa_pm
+    return (SCORE_MATIX[status] + SCORE_MATIX['gaps'] * gap, 
+            nt_weight * nt_pm + aa_weight * aa_pm)
+
+
+_LEVELS = {}
+_KEY_SHIFT = 96
+
+
+def _int_key(status_score, counts_score):
+    """Fold a sort key into one int, which compares faster than the tuple.
+
+    status_score is replaced by its rank among the possible ones, and
+    counts_score must be within +-2**95.
+
+    """
+
+    names = ('Y', 'Conserved', 'PM', 'NA')
+    scores = tuple(SCORE_MATIX[name] for name in names + ('gaps', ))
+    try:
+        levels = _LEVELS[scores]
+    except KeyError:
+        levels = _LEVELS[scores] = dict((score, level) for level, score
+                in enumerate(sorted(set(SCORE_MATIX[name] 
+                                        + SCORE_MATIX['gaps'] * gap
+                                        for name in names
+                                        for gap in (0, 1)))))
+    return (levels[status_score] << _KEY_SHIFT) + counts_score
+
+
+def rank(statuses, k=None):
+    """Rank statuses from the best, see NA for the order.
+
+    The sort keys of all the statuses are worked out as NumPy arrays and
+    ranked by argsort, or argpartition when k is given, instead of
+    comparing the statuses pair by pair. Equal statuses keep their order.
+
+    Return int array of indexes in statuses, the best first.
+
+    Args:
+    statuses -- sequence of status objects with consistent stdseqs
+
+    k -- return the best k only, default all
+
+    """
+
+    statuses = list(statuses)
+    n = len(statuses)
+    if k is not None and k < 1:
+        raise ValueError("k must be a positive integer")
+    if n == 0:
+        return np.zeros(0, dtype=np.intp)
+    _check_consistent(statuses)
+
+    nt_weight, aa_weight = _count_weights()
+    gaps_score = SCORE_MATIX['gaps']
+    status_scores = np.fromiter(
+            (SCORE_MATIX[s.__status__] + (gaps_score if s.gaps > 0 else 0)
+             for s in statuses), dtype=np.float64, count=n)
+    counts_scores = np.fromiter(
+            (nt_weight * s.nt_pm 
+             + aa_weight * (MAX_BASE if s.aa_pm is None else s.aa_pm)
+             for s in statuses), dtype=np.int64, count=n)
+
+    # one exact integer key: the rank of status_score, then counts_score
+    levels, level = np.unique(status_scores, return_inverse=True)
+    low = counts_scores.min()
+    keys = level.astype(np.int64) * (int(counts_scores.max()) - low + 1) \
+           + (counts_scores - low)
+    if k is not None and k < n:
+        kth = np.partition(keys, n - k)[n - k]
+        candidates = np.flatnonzero(keys >= kth)
+        order = np.argsort(-keys[candidates], kind='stable')
+        return candidates[order[:k]]
+    return np.argsort(-keys, kind='stable')
+
+
+def _check_consistent(statuses):
+    """Raise TypeError if statuses have inconsistent stdseqs"""
+
+    first = statuses[0]
+    reference = first.reference
+    if reference is not None \
+            and all(s.reference is reference for s in statuses):
+        return
+    fp = first.get_fingerprint()
+    for s in statuses:
+        if s.reference is not reference or reference is None:
+            if s.get_fingerprint() != fp:
+                raise TypeError("unorderable when stdseqs are inconsistent.")
+
+
 class NA(object):
     """Base object of PM status
 
+    Status objects are slotted. A status built with a shared reference
+    keeps only a handle of it, see pm.reference.intern, and a status built
+    in light model of pm.analyze does not keep seq at all, so its memory is
+    independent of the sequence length.
+
     """
     
     __status__ = "NA"
+    __slots__ = ('seq', '_stdseq', 'reference', 'length', '_pattern', 
+                 '_make_pattern', 'gaps', 'nt_pm', 'aa_pm', 'score', 
+                 '_key', '_cached_non_gaps_stdseq', '_fingerprint')
 
-    def __init__(self, seq=None, stdseq=None, pattern=None, length=0, gaps=0, nt_pm=0, aa_pm=None):
+    def __init__(self, seq=None, stdseq=None, pattern=None, length=0, gaps=0, nt_pm=0, aa_pm=None, reference=None):
         """
         
         Args:
 
-        seq -- sequence
+        seq -- sequence, None if it is not kept
 
-        stdseq -- standar sequence(might be gaps contained)
+        stdseq -- standar sequence(might be gaps contained). Default to
+                  reference.stdseq if reference is given.
 
         pattern -- pattern object, see pm.pattern
 
@@ -67,17 +234,60 @@ class NA(object):
         aa_pm -- amino mutation amount. If in a translating model, 
                  aa_pm will be an valid int, else None
 
+        reference -- pm.reference.Reference object of stdseq, shared
+                     between statuses to avoid removing gaps from stdseq
+                     for each of them
+
         """
 
         self.seq = seq
-        self.stdseq = stdseq
+        self._stdseq = stdseq
+        self.reference = reference
         self.length = length
-        self.pattern = pattern
+        self._pattern = pattern
+        self._make_pattern = None
         self.gaps = gaps
         self.nt_pm = nt_pm
         self.aa_pm = aa_pm
+        timer = _instrument._start()
         self.score = self._score()
+        self._key = _int_key(*self.sort_key())
+        _instrument._stop('score', timer)
         self._cached_non_gaps_stdseq = None
+        self._fingerprint = None
+
+    @property
+    def stdseq(self):
+        """Standard sequence, reference.stdseq if it is not given"""
+
+        if self._stdseq is None and self.reference is not None:
+            return self.reference.stdseq
+        return self._stdseq
+
+    @stdseq.setter
+    def stdseq(self, stdseq):
+        self._stdseq = stdseq
+
+    @property
+    def pattern(self):
+        """Pattern object, see pm.pattern. Built on first access if the
+        status is analyzed in lazy model."""
+
+        if self._make_pattern is not None:
+            self._pattern = self._make_pattern()
+            self._make_pattern = None
+        return self._pattern
+
+    @pattern.setter
+    def pattern(self, pattern):
+        self._pattern = pattern
+        self._make_pattern = None
+
+    def _defer_pattern(self, make_pattern):
+        """Build pattern by calling make_pattern() on first access"""
+
+        self._pattern = None
+        self._make_pattern = make_pattern
 
     def __str__(self):
         """Convert to string."""
@@ -87,68 +297,92 @@ class NA(object):
     def _score(self):
         """Calculate score of this status"""
 
-        gap = 1 if self.gaps > 0 else 0
-        aa_pm = MAX_BASE if self.aa_pm is None else self.aa_pm
-        score = SCORE_MATIX[self.__status__] \
-                + SCORE_MATIX['gaps'] * gap \
-                + SCORE_MATIX['nt_pm'] * self.nt_pm / MAX_BASE \
-                + SCORE_MATIX['aa_pm'] * aa_pm / MAX_BASE
-        return score
+        return score(self.__status__, self.gaps, self.nt_pm, self.aa_pm)
+
+    def sort_key(self):
+        """Return exact sort key of this status, see sort_key.
+
+        Statuses are compared by it. It is worked out once, when the
+        status is built.
+
+        """
+
+        return sort_key(self.__status__, self.gaps, self.nt_pm, self.aa_pm)
 
     def __eq__(self, other):
         if not self._is_valid_operand(other):
             return NotImplemented
 
-        return self.score == other.score
+        return self._key == other._key
 
     def __lt__(self, other):
         if not self._is_valid_operand(other):
             return NotImplemented
 
-        return self.score < other.score
+        return self._key < other._key
 
     def __le__(self, other):
         if not self._is_valid_operand(other):
             return NotImplemented
 
-        return self.score <= other.score
+        return self._key <= other._key
 
     def __gt__(self, other):
         if not self._is_valid_operand(other):
             return NotImplemented
 
-        return self.score > other.score
+        return self._key > other._key
 
     def __ge__(self, other):
         if not self._is_valid_operand(other):
             return NotImplemented
 
-        return self.score >= other.score
+        return self._key >= other._key
 
     def get_stdseq_without_gaps(self):
         """Removes gaps from self.stdseq and caches it"""
+        if self.reference is not None:
+            return self.reference.stdseq_without_gaps
         if self._cached_non_gaps_stdseq is None \
                 and self.stdseq is not None:
             self._cached_non_gaps_stdseq = self.stdseq.replace(
                     '-', '').upper()
         return self._cached_non_gaps_stdseq
 
+    def get_fingerprint(self):
+        """Return fingerprint of the gaps-removed stdseq and caches it.
+
+        Return None if there is no stdseq. See pm.reference.fingerprint.
+
+        """
+        if self.reference is not None:
+            return self.reference.fingerprint
+        if self._fingerprint is None and self.stdseq is not None:
+            stdseq = self._cached_non_gaps_stdseq
+            if stdseq is None:
+                stdseq = self.stdseq.replace('-', '').upper()
+            self._fingerprint = fingerprint(stdseq)
+        return self._fingerprint
+
     def _is_valid_operand(self, other):
         """Check"""
 
         if isinstance(other, NA):
-            if other.get_stdseq_without_gaps() != \
-                    self.get_stdseq_without_gaps():
+            if other.reference is not None \
+                    and other.reference is self.reference:
+                return True
+            if other.get_fingerprint() != self.get_fingerprint():
                 raise TypeError("unorderable when stdseqs are inconsistent.")
             return True
 
         return False
 
     def __repr__(self):
-        if self.stdseq is not None and len(self.stdseq) > 60:
-            s = self.stdseq[0:27] + "..." + self.stdseq[-27:]
+        stdseq = self.stdseq
+        if stdseq is not None and len(stdseq) > 60:
+            s = stdseq[0:27] + "..." + stdseq[-27:]
         else:
-            s = self.seq
+            s = stdseq
         return "<pm.status.{} object with: gaps={}, nt_pm={}, aa_pm={}, " \
                "stdseq='{}'>".format(self.__status__, self.gaps, 
                                   self.nt_pm, self.aa_pm, s)
@@ -157,11 +391,13 @@ class NA(object):
 class Y(NA):
     
     __status__ = "Y"
+    __slots__ = ()
 
 
 class Conserved(NA):
     
     __status__ = "Conserved"
+    __slots__ = ()
 
     def __init__(self, *args, **kwargs):
         super(Conserved, self).__init__(*args, **kwargs)
@@ -171,3 +407,4 @@ class Conserved(NA):
 class PM(NA):
     
     __status__ = "PM"
+    __slots__ = ()
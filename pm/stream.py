@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming PM analyzing for aligned FASTA.
+
+Records are read from the handle one at a time and analyzed as they come,
+so memory use does not grow with the size of the alignment.
+
+Functions:
+iter_fasta(handle)
+iter_analyze(handle, stdseq, translate=True, table=1, light=False)
+
+"""
+
+from Bio.SeqIO.FastaIO import SimpleFastaParser
+
+from . import _analyze
+from .reference import Reference, intern
+
+
+def iter_fasta(handle):
+    """Yield (record_id, seq) for each record of an (aligned) FASTA handle.
+
+    The record id is the first word of the title line.
+
+    """
+
+    for title, seq in SimpleFastaParser(handle):
+        yield (title.split(None, 1)[0] if title else title), seq
+
+
+def iter_analyze(handle, stdseq, translate=True, table=1, light=False):
+    """Analyze each record of an aligned FASTA handle against stdseq.
+
+    Yield (record_id, status) lazily, in the order of the records.
+
+    Args:
+    handle -- text handle of aligned FASTA
+
+    stdseq -- glable pairwised standard sequence of the records, or a
+              pm.reference.Reference object of it
+
+    translate -- active translate model, default True. See pm.analyze.
+
+    table -- NCBI genetic code id or name, default 1. See pm.analyze.
+
+    light -- lightweight model, default False. See pm.analyze.
+
+    """
+
+    if not isinstance(stdseq, Reference):
+        stdseq = intern(stdseq)
+    for record_id, seq in iter_fasta(handle):
+        yield record_id, _analyze(seq, stdseq, translate, table, light=light)
+
+
+__all__ = ["iter_fasta", "iter_analyze", ]
@@ -12,9 +12,15 @@ setuptools.setup(
     long_description=open('README.rst').read(),
 
     packages = ["pm", ],
+    entry_points = {
+        'console_scripts': ['bio-pm = pm.cli:main', ],
+    },
 
     license = "MIT",
-    install_requires = ['biopython', ],
+    install_requires = ['biopython', 'numpy', ],
+    extras_require = {
+        'arrow': ['pyarrow', ],
+    },
     classifiers= [
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -25,6 +31,8 @@ setuptools.setup(
         'Programming Language :: Python :: 3',
         'Programming Language :: Python :: 3.4',
         'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6'
+        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8'
     ]
 )
\ No newline at end of file
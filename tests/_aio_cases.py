@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test cases for aio, imported by test_aio on Python 3.7 or later"""
+
+import asyncio
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from pm import analyze as sync_analyze
+from pm import aio
+
+
+STDSEQ = 'ATGTCGTTCTGCAGCTTC'
+SEQS = [STDSEQ, 'ATGTCGTTCTGCAGCTTT', 'ATGTCATTCTGGAGCTTC', 'ATG---TTCTGCAGCTTC']
+
+
+def _same(test, status, seq, **kwargs):
+    ex = sync_analyze(seq, STDSEQ, **kwargs)
+    test.assertIs(type(status), type(ex))
+    test.assertEqual(status.pattern.list(), ex.pattern.list())
+    test.assertEqual(status.score, ex.score)
+
+
+class RoutineTest(unittest.TestCase):
+    """Routine test."""
+
+    def test_analyze(self):
+        """aio.analyze should give the status of pm.analyze"""
+
+        for seq in SEQS:
+            _same(self, asyncio.run(aio.analyze(seq, STDSEQ)), seq)
+        status = asyncio.run(aio.analyze(SEQS[2], STDSEQ, translate=False))
+        _same(self, status, SEQS[2], translate=False)
+
+    def test_analyze_many(self):
+        """aio.analyze_many should yield statuses in order"""
+
+        async def collect(seqs, **kwargs):
+            return [s async for s in aio.analyze_many(seqs, STDSEQ, **kwargs)]
+
+        async def aseqs():
+            for seq in SEQS * 5:
+                yield seq
+
+        with ThreadPoolExecutor(2) as executor:
+            for seqs in (SEQS * 5, aseqs()):
+                statuses = asyncio.run(collect(seqs, executor=executor,
+                                               max_pending=3))
+                self.assertEqual(len(statuses), len(SEQS) * 5)
+                for status, seq in zip(statuses, SEQS * 5):
+                    _same(self, status, seq)
+
+    @unittest.skipIf(sys.version_info < (3, 8),
+                     "process executor needs Python 3.8 or later")
+    def test_process_executor(self):
+        """statuses from a process executor should share the Reference"""
+
+        from pm.shared import SharedReference
+
+        async def collect():
+            return [s async for s in analyzer.analyze_many(
+                    SEQS, STDSEQ, light=True)]
+
+        with ProcessPoolExecutor(2) as executor:
+            with aio.AsyncAnalyzer(executor) as analyzer:
+                statuses = asyncio.run(collect())
+                status = asyncio.run(analyzer.analyze(SEQS[1], STDSEQ))
+                # the stdseq is placed in shared memory once
+                names = [shared.name for shared in analyzer._shared.values()]
+                self.assertEqual(len(names), 1)
+            other = asyncio.run(aio.analyze(SEQS[2], STDSEQ,
+                                            executor=executor))
+        self.assertRaises(FileNotFoundError, SharedReference.attach, names[0])
+        for status_, seq in zip(statuses, SEQS):
+            _same(self, status_, seq, light=True)
+            self.assertIsNone(status_.seq)
+            self.assertNotIsInstance(status_.reference, SharedReference)
+        self.assertIs(statuses[0].reference, statuses[1].reference)
+        self.assertEqual(status.seq, SEQS[1])
+        _same(self, status, SEQS[1])
+        _same(self, other, SEQS[2])
+
+    def test_event_loops(self):
+        """AsyncAnalyzer should be reusable across event loops"""
+
+        analyzer = aio.AsyncAnalyzer(max_pending=2)
+        for seq in SEQS[:2]:
+            _same(self, asyncio.run(analyzer.analyze(seq, STDSEQ)), seq)
+
+    def test_max_pending(self):
+        """AsyncAnalyzer should keep at most max_pending jobs in flight"""
+
+        lock = threading.Lock()
+        counts = {'now': 0, 'max': 0}
+        release = threading.Event()
+
+        class Executor(ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                def job():
+                    with lock:
+                        counts['now'] += 1
+                        counts['max'] = max(counts['max'], counts['now'])
+                    release.wait()
+                    try:
+                        return fn(*args, **kwargs)
+                    finally:
+                        with lock:
+                            counts['now'] -= 1
+                return super(Executor, self).submit(job)
+
+        async def main(executor):
+            analyzer = aio.AsyncAnalyzer(executor, max_pending=2)
+            tasks = [asyncio.ensure_future(analyzer.analyze(seq, STDSEQ))
+                     for seq in SEQS * 3]
+            await asyncio.sleep(0.05)
+            self.assertEqual(counts['now'], 2)
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        with Executor(8) as executor:
+            statuses = asyncio.run(main(executor))
+        self.assertEqual(counts['max'], 2)
+        self.assertEqual(len(statuses), len(SEQS) * 3)
+
+        async def separate_calls(executor):
+            tasks = [asyncio.ensure_future(aio.analyze(seq, STDSEQ,
+                                                       executor=executor))
+                     for seq in SEQS * 8]
+            await asyncio.sleep(0.05)
+            self.assertEqual(counts['now'], 16)
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        release.clear()
+        counts['max'] = 0
+        with Executor(32) as executor:
+            statuses = asyncio.run(separate_calls(executor))
+        self.assertEqual(counts['max'], 16)
+        self.assertEqual(len(statuses), len(SEQS) * 8)
+
+    def test_cancel(self):
+        """cancelling should not leave jobs queued"""
+
+        release = threading.Event()
+        started = []
+
+        class Executor(ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                def job():
+                    started.append(1)
+                    release.wait()
+                    return fn(*args, **kwargs)
+                return super(Executor, self).submit(job)
+
+        async def main(executor):
+            analyzer = aio.AsyncAnalyzer(executor, max_pending=4)
+            agen = analyzer.analyze_many(SEQS * 10, STDSEQ)
+            task = asyncio.ensure_future(agen.__anext__())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            await agen.aclose()
+            release.set()
+            # the slots are released, the analyzer is still usable
+            return await analyzer.analyze(SEQS[1], STDSEQ)
+
+        with Executor(1) as executor:
+            status = asyncio.run(main(executor))
+        self.assertEqual(len(started), 2)
+        _same(self, status, SEQS[1])
+
+    def test_raise_ValueError(self):
+        """AsyncAnalyzer should reject non positive max_pending"""
+
+        self.assertRaises(ValueError, aio.AsyncAnalyzer, max_pending=0)
+        with self.assertRaises(ValueError):
+            asyncio.run(aio.analyze('ATG', STDSEQ))
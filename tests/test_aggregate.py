@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test for aggregate"""
+
+import unittest
+
+from pm import analyze
+from pm.aggregate import MutationPileup, NT_ALPHABET, AA_ALPHABET
+
+
+STDSEQ = 'ATGTCGTTCTGCAGCTTC'
+SEQS = [STDSEQ, 'ATGTCGTTCTGCAGCTTT', 'ATGTCATTCTGGAGCTTC', 'ATG---TTCTGCAGCTTC']
+
+
+def _count(seqs, pos, alphabet):
+    """count bases at 1-based pos"""
+
+    counts = [0] * len(alphabet)
+    for seq in seqs:
+        counts[alphabet.index(seq[pos-1])] += 1
+    return counts
+
+
+class RoutineTest(unittest.TestCase):
+    """Routine test."""
+
+    def test_nt_counts(self):
+        """nt_counts should count every base at every position"""
+
+        pileup = MutationPileup(STDSEQ)
+        pileup.update(SEQS)
+        self.assertEqual(len(pileup), 4)
+        counts = pileup.nt_counts
+        self.assertEqual(counts.shape, (len(STDSEQ), len(NT_ALPHABET)))
+        for pos in range(1, len(STDSEQ) + 1):
+            self.assertEqual(counts[pos-1].tolist(),
+                             _count(SEQS, pos, NT_ALPHABET))
+        self.assertEqual(pileup.nt_mutant_counts.sum(), 6)
+        self.assertEqual(pileup.nt_frequencies()[5].tolist(),
+                         [0.25, 0, 0.5, 0, 0, 0.25])
+
+    def test_rna(self):
+        """U should be counted as T"""
+
+        stdseq = STDSEQ.replace('T', 'U')
+        seqs = [seq.replace('T', 'U') for seq in SEQS]
+        pileup = MutationPileup(stdseq)
+        pileup.update(seqs)
+        dna = MutationPileup(STDSEQ)
+        dna.update(SEQS)
+        self.assertEqual(pileup.nt_counts.tolist(), dna.nt_counts.tolist())
+        self.assertEqual(pileup.aa_counts.tolist(), dna.aa_counts.tolist())
+
+    def test_aa_counts(self):
+        """aa_counts should count amino acid changes at each codon"""
+
+        pileup = MutationPileup(STDSEQ)
+        for seq in SEQS:
+            pileup.add_pattern(analyze(seq, STDSEQ).pattern)
+        aa_counts = pileup.aa_counts
+        self.assertEqual(aa_counts.shape, (6, len(AA_ALPHABET)))
+        self.assertEqual(aa_counts.sum(axis=1).tolist(), [4] * 6)
+        self.assertEqual(aa_counts[1, AA_ALPHABET.index('S')], 3)
+        self.assertEqual(aa_counts[1, AA_ALPHABET.index('-')], 1)
+        self.assertEqual(aa_counts[3, AA_ALPHABET.index('W')], 1)
+        self.assertEqual(aa_counts[5, AA_ALPHABET.index('F')], 4)
+        self.assertEqual(pileup.aa_frequencies()[3, AA_ALPHABET.index('C')],
+                         0.75)
+
+    def test_merge(self):
+        """merge should equal to a pileup of all the reads"""
+
+        whole = MutationPileup(STDSEQ)
+        whole.update(SEQS)
+        left, right = MutationPileup(STDSEQ), MutationPileup(STDSEQ)
+        left.update(SEQS[:2])
+        right.update(SEQS[2:])
+        self.assertIs(left.merge(right), left)
+        self.assertEqual(left.reads, whole.reads)
+        self.assertEqual(left.nt_counts.tolist(), whole.nt_counts.tolist())
+        self.assertEqual(left.aa_counts.tolist(), whole.aa_counts.tolist())
+
+        self.assertRaises(ValueError, left.merge, MutationPileup(SEQS[1]))
+        self.assertRaises(ValueError, left.merge,
+                          MutationPileup(STDSEQ, translate=False))
+
+    def test_plain(self):
+        """no amino acid counts without translate"""
+
+        pileup = MutationPileup(STDSEQ, translate=False)
+        self.assertEqual(pileup.nt_frequencies().sum(), 0)
+        pileup.update(SEQS)
+        self.assertIsNone(pileup.aa_counts)
+        self.assertIsNone(pileup.aa_frequencies())
+        self.assertEqual(pileup.nt_counts.sum(), len(STDSEQ) * len(SEQS))
+
+
+if __name__ == '__main__':
+    unittest.main()
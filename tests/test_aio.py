@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test for aio
+
+The test cases are in _aio_cases, which older Pythons can not compile.
+
+"""
+
+import sys
+import unittest
+
+if sys.version_info >= (3, 7):
+    from _aio_cases import RoutineTest
+else:
+    @unittest.skip("pm.aio needs Python 3.7 or later")
+    class RoutineTest(unittest.TestCase):
+        """Routine test."""
+
+        def test_aio(self):
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
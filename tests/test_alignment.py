@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test for alignment"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from pm import analyze
+from pm.alignment import MappedAlignment
+from pm.pattern import parse
+
+
+STDSEQ = 'ATGTCGTTCTGCAGCTTC'
+FASTA = b""">ref the reference
+ATGTCGTTCTGCAGCTTC
+>r1
+atgtcgttctgcagcttt
+>r2 wrapped
+ATGTCG-TC\r
+TGCAGCTTC\r
+
+>r3
+ATGTCGTTCTGCAGCTTC"""
+
+
+class RoutineTest(unittest.TestCase):
+    """Routine test."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'aln.fasta')
+        with open(self.path, 'wb') as f:
+            f.write(FASTA)
+        self.aln = MappedAlignment(self.path)
+
+    def tearDown(self):
+        self.aln.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_index(self):
+        """MappedAlignment should index ids and sequences of the records"""
+
+        self.assertEqual(len(self.aln), 4)
+        self.assertEqual(self.aln.ids, ['ref', 'r1', 'r2', 'r3'])
+        self.assertEqual(self.aln.index('r2'), 2)
+        self.assertEqual(bytes(self.aln.seq(0)), STDSEQ.encode('ascii'))
+        self.assertEqual(bytes(self.aln.seq(1)), b'atgtcgttctgcagcttt')
+        self.assertEqual(bytes(self.aln.seq(2)), b'ATGTCG-TCTGCAGCTTC')
+        self.assertEqual(bytes(self.aln.seq(3)), STDSEQ.encode('ascii'))
+        if sys.version_info[0] >= 3:
+            self.assertIsInstance(self.aln.seq(1), memoryview)
+        record_id, seq = self.aln[-1]
+        self.assertEqual(record_id, 'r3')
+        with self.assertRaises(KeyError):
+            self.aln.index('missing')
+
+    def test_parse_bytes_like(self):
+        """parse should give the same pattern for bytes-like sequences"""
+
+        seq = self.aln.seq(1)
+        for translate in (False, True):
+            ex = parse('atgtcgttctgcagcttt', STDSEQ, translate)
+            self.assertEqual(parse(seq, STDSEQ, translate).list(), ex.list())
+            self.assertEqual(parse(seq, self.aln.seq(0), translate).list(),
+                             ex.list())
+
+    def test_iter_analyze(self):
+        """MappedAlignment.iter_analyze should analyze against stdseq_id"""
+
+        seqs = [bytes(self.aln.seq(n)).decode('ascii') for n in (1, 2, 3)]
+        for light in (False, True):
+            results = list(self.aln.iter_analyze('ref', light=light))
+            self.assertEqual([r[0] for r in results], ['r1', 'r2', 'r3'])
+            for seq, (record_id, status) in zip(seqs, results):
+                ex = analyze(seq, STDSEQ)
+                self.assertIs(type(status), type(ex))
+                self.assertEqual(status.seq, None if light else seq)
+                self.assertEqual((status.gaps, status.nt_pm, status.aa_pm),
+                                 (ex.gaps, ex.nt_pm, ex.aa_pm))
+                self.assertEqual(status.pattern.list(), ex.pattern.list())
+        # statuses keep no view of the map
+        self.aln.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
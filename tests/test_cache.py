@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test for cache"""
+
+import unittest
+
+from pm import analyze
+from pm.cache import AnalyzeCache
+
+
+STDSEQ = 'ATGTCGTTCTGCAGCTTC'
+
+
+class RoutineTest(unittest.TestCase):
+    """Routine test."""
+
+    def test_analyze_repeated_read(self):
+        """AnalyzeCache should return the same status for a repeated read"""
+
+        cache = AnalyzeCache()
+        seq = 'ATGTCGTTCTGCAGCTTT'
+        s1 = cache.analyze(seq, STDSEQ)
+        s2 = cache.analyze(''.join(list(seq)), STDSEQ)
+        self.assertIs(s1, s2)
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 1, 1))
+        self.assertEqual(s1.pattern.list(), analyze(seq, STDSEQ).pattern.list())
+
+        s3 = cache.analyze(seq, STDSEQ, translate=False)
+        self.assertIsNot(s1, s3)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        s4 = cache.analyze(seq.encode('ascii'), STDSEQ)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertIs(cache.analyze(memoryview(seq.encode('ascii')), STDSEQ), s4)
+
+    def test_analyze_many(self):
+        """AnalyzeCache.analyze_many should analyze each distinct read once"""
+
+        cache = AnalyzeCache()
+        seqs = [STDSEQ, 'ATGTCGTTCTGCAGCTTT', STDSEQ, STDSEQ]
+        statuses = list(cache.analyze_many(seqs, STDSEQ))
+        self.assertEqual([str(s) for s in statuses], ['Y', 'Conserved', 'Y', 'Y'])
+        self.assertIs(statuses[0], statuses[3])
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_gaps_placed_differently(self):
+        """AnalyzeCache should tell apart stdseqs differing in gaps only"""
+
+        cache = AnalyzeCache()
+        seq = 'ATGCAAT'
+        for stdseq in ('ATG-AAT', 'ATGA-AT'):
+            status = cache.analyze(seq, stdseq, translate=False)
+            self.assertEqual(status.stdseq, stdseq)
+            self.assertEqual(
+                    status.pattern.list(),
+                    analyze(seq, stdseq, translate=False).pattern.list())
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_lru_eviction(self):
+        """AnalyzeCache should evict the least recently used status"""
+
+        cache = AnalyzeCache(maxsize=2)
+        a, b, c = 'ATGTCGTTCTGCAGCTTA', 'ATGTCGTTCTGCAGCTTG', 'ATGTCGTTCTGCAGCTTT'
+        sa = cache.analyze(a, STDSEQ)
+        cache.analyze(b, STDSEQ)
+        cache.analyze(a, STDSEQ)
+        cache.analyze(c, STDSEQ)
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.analyze(a, STDSEQ), sa)
+        misses = cache.misses
+        cache.analyze(b, STDSEQ)
+        self.assertEqual(cache.misses, misses + 1)
+
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+
+    def test_raise_ValueError(self):
+        """AnalyzeCache should raise ValueError when maxsize < 1"""
+
+        with self.assertRaises(ValueError):
+            AnalyzeCache(maxsize=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test for chunked"""
+
+import random
+import unittest
+
+from pm import analyze, parse, TranslationError
+from pm import chunked
+from pm.pattern import CompactPlainPattern, CompactTranslatedPattern
+
+
+class RoutineTest(unittest.TestCase):
+    """Routine test."""
+
+    def setUp(self):
+        rnd = random.Random(13)
+        self.stdseq = ''.join(rnd.choice('ACGT') for _ in range(3000))
+        self.seqs = [''.join(rnd.choice('ACGTacgtRN') if rnd.random() < rate
+                             else b for b in self.stdseq)
+                     for rate in (0.0, 0.001, 0.01, 0.1)]
+        self.seqs.append(self.seqs[2][:300] + '---' + self.seqs[2][303:])
+
+    def test_analyze(self):
+        """chunked.analyze should give the status of pm.analyze"""
+
+        for seq in self.seqs:
+            for translate in (True, False):
+                ex = analyze(seq, self.stdseq, translate=translate,
+                             compact=True)
+                for window, workers in ((30, 4), (3001, 2), (10, 1)):
+                    st = chunked.analyze(seq, self.stdseq,
+                                         translate=translate, window=window,
+                                         workers=workers)
+                    self.assertIs(type(st), type(ex))
+                    self.assertEqual((st.gaps, st.nt_pm, st.aa_pm),
+                                     (ex.gaps, ex.nt_pm, ex.aa_pm))
+                    self.assertEqual(st.pattern.list(), ex.pattern.list())
+                    self.assertEqual(st.seq, seq)
+        st = chunked.analyze(self.seqs[1].encode('ascii'), self.stdseq,
+                             light=True, window=300)
+        self.assertIsNone(st.seq)
+        self.assertIsInstance(st.pattern, CompactTranslatedPattern)
+
+    def test_parse(self):
+        """chunked.parse should give the pattern of pm.parse"""
+
+        seq = self.seqs[3]
+        for translate in (True, False):
+            pattern = chunked.parse(seq, self.stdseq, translate=translate,
+                                    window=99, workers=3)
+            self.assertEqual(pattern.list(), parse(
+                    seq, self.stdseq, translate=translate).list())
+        self.assertIsInstance(chunked.parse(seq, self.stdseq), 
+                              CompactPlainPattern)
+
+    def test_raise(self):
+        """chunked should raise as pm.analyze does"""
+
+        self.assertRaises(ValueError, chunked.analyze, 'ATG', self.stdseq)
+        self.assertRaises(KeyError, chunked.parse, 'ATGA', 'ATGC',
+                          translate=True)
+        self.assertRaises(TranslationError, chunked.analyze, 'ATGATZ', 
+                          'ATGATG', window=3)
+        self.assertRaises(AssertionError, chunked.analyze, 'AT-GAA',
+                          'AT-GAA', translate=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
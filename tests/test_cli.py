@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test for cli"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pm.cli import main
+
+
+FASTA = """>ref
+ATGTCGTTCTGCAGCTTC
+>r1
+ATGTCGTTCTGCAGCTTT
+>r2
+ATGTCG-TCTGCAGCTTC
+>r3
+ATGTCGTTCTGCAGCTTC
+"""
+
+
+class RoutineTest(unittest.TestCase):
+    """Routine test."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'aln.fasta')
+        self.output = os.path.join(self.tmpdir, 'out')
+        with open(self.path, 'w') as f:
+            f.write(FASTA)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read_output(self):
+        with open(self.output) as f:
+            return f.read().splitlines()
+
+    def test_tsv(self):
+        """bio-pm should write TSV rows in the input order"""
+
+        main([self.path, 'ref', '-w', '1', '-o', self.output])
+        self.assertEqual(self.read_output(), [
+            'id\tstatus\tgaps\tnt_pm\taa_pm\tnt_mutants\taa_mutants',
+            'r1\tConserved\t0\t1\t0\t18C>T\t6F=F',
+            'r2\tNA\t1\t0\t0\t7delT\t3delF',
+            'r3\tY\t0\t0\t0\t\t'])
+
+    def test_jsonl_no_translate(self):
+        """bio-pm --no-translate should write JSON lines"""
+
+        main([self.path, 'ref', '-w', '2', '-c', '1', '-f', 'jsonl',
+              '--no-translate', '-o', self.output])
+        rows = [json.loads(line) for line in self.read_output()]
+        self.assertEqual([r['id'] for r in rows], ['r1', 'r2', 'r3'])
+        self.assertEqual(rows[0], {'id': 'r1', 'status': 'NA', 'gaps': 0,
+                                   'nt_pm': 1, 'aa_pm': None,
+                                   'nt_mutants': '18C>T', 'aa_mutants': None})
+
+    def test_missing_reference(self):
+        """bio-pm should exit with an error for a missing reference"""
+
+        with self.assertRaises(SystemExit) as cm:
+            main([self.path, 'missing', '-w', '1', '-o', self.output])
+        self.assertEqual(cm.exception.code, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test for columnar"""
+
+import unittest
+from functools import partial
+
+from pm import analyze, analyze_many
+from pm.columnar import (to_columns, analyze_columns, to_arrow, write_parquet,
+                         write_feather, STATUS_CODES, STATUS_DTYPE,
+                         MUTANT_DTYPE)
+
+
+STDSEQ = 'ATGTCGTTCTGCAGCTTC'
+SEQS = [STDSEQ, 'ATGTCGTTCTGCAGCTTT', 'ATGTCATTCTGGAGCTTC', 'ATG---TTCTGCAGCTTC']
+
+
+class RoutineTest(unittest.TestCase):
+    """Routine test."""
+
+    def test_to_columns(self):
+        """to_columns should gather statuses and their mutants"""
+
+        statuses, mutants = to_columns(analyze_many(SEQS, STDSEQ))
+        self.assertEqual(statuses.dtype, STATUS_DTYPE)
+        self.assertEqual(mutants.dtype, MUTANT_DTYPE)
+        expected = [analyze(seq, STDSEQ) for seq in SEQS]
+        self.assertEqual(statuses['status'].tolist(),
+                         [STATUS_CODES[str(s)] for s in expected])
+        self.assertEqual(statuses['score'].tolist(), [s.score for s in expected])
+        self.assertEqual(statuses['gaps'].tolist(), [0, 0, 0, 3])
+        self.assertEqual(statuses['nt_pm'].tolist(), [0, 1, 2, 0])
+        self.assertEqual(statuses['aa_pm'].tolist(), [0, 0, 1, 0])
+        self.assertEqual(
+            [tuple(v.decode() if isinstance(v, bytes) else v for v in row)
+             for row in mutants.tolist()],
+            [(1, 18, 'C', 'T', 6, 'F', 'F'),
+             (2, 6, 'G', 'A', 2, 'S', 'S'), (2, 12, 'C', 'G', 4, 'C', 'W'),
+             (3, 4, 'T', '-', 2, 'S', '-'), (3, 5, 'C', '-', 2, 'S', '-'),
+             (3, 6, 'G', '-', 2, 'S', '-')])
+
+    def test_compact_and_plain(self):
+        """compact patterns and non translated statuses give the same rows"""
+
+        for translate in (True, False):
+            plain = to_columns(analyze_many(SEQS, STDSEQ, translate=translate))
+            compact = analyze_columns(SEQS, STDSEQ, translate=translate)
+            self.assertEqual(plain[0].tolist(), compact[0].tolist())
+            self.assertEqual(plain[1].tolist(), compact[1].tolist())
+        statuses, mutants = compact
+        self.assertEqual(statuses['aa_pm'].tolist(), [-1] * len(SEQS))
+        self.assertEqual(mutants['aa_pos'].tolist(), [0] * len(mutants))
+
+    def test_empty(self):
+        """to_columns should give empty tables for no status"""
+
+        statuses, mutants = to_columns([])
+        self.assertEqual((len(statuses), len(mutants)), (0, 0))
+        statuses, mutants = analyze_columns([STDSEQ], STDSEQ)
+        self.assertEqual((len(statuses), len(mutants)), (1, 0))
+
+    def test_to_arrow(self):
+        """to_arrow should convert tables, or ask for pyarrow"""
+
+        statuses, mutants = analyze_columns(SEQS, STDSEQ)
+        try:
+            import pyarrow
+        except ImportError:
+            for convert in (to_arrow, partial(write_parquet, path='x'),
+                            partial(write_feather, path='x')):
+                with self.assertRaises(ImportError) as context:
+                    convert(mutants)
+                self.assertIn('bio-pm[arrow]', str(context.exception))
+        else:
+            table = to_arrow(mutants)
+            self.assertEqual(table.column_names, list(MUTANT_DTYPE.names))
+            self.assertEqual(table.column('std_aa').to_pylist()[-1], 'S')
+
+
+if __name__ == '__main__':
+    unittest.main()
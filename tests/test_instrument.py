@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test for instrument"""
+
+import unittest
+
+from pm import analyze
+from pm.instrument import Recorder, recording, register, unregister
+
+
+STDSEQ = 'ATGTCGTTCTGCAGCTTC'
+SEQ = 'ATCTCGTTCTGCAGCTTT'
+
+
+class RoutineTest(unittest.TestCase):
+    """Routine test."""
+
+    def test_recording(self):
+        """recording should collect stage timings and counters"""
+
+        with recording() as recorder:
+            analyze(SEQ, STDSEQ)
+            analyze(STDSEQ, STDSEQ, translate=False)
+        analyze(SEQ, STDSEQ)
+
+        stages = recorder.as_dict()['stages']
+        self.assertEqual(stages['analyze']['calls'], 2)
+        self.assertEqual(stages['diff']['calls'], 2)
+        self.assertEqual(stages['translate']['calls'], 1)
+        self.assertEqual(stages['status']['calls'], 2)
+        self.assertEqual(stages['score']['calls'], 2)
+        self.assertTrue(all(s['seconds'] >= 0 for s in stages.values()))
+        self.assertEqual(recorder.counters, {'reads': 2, 'mutations': 2,
+                                             'codons': 2})
+
+    def test_lazy_recording(self):
+        """recording should collect the count stage in lazy model"""
+
+        with recording() as recorder:
+            status = analyze(SEQ, STDSEQ, lazy=True)
+            self.assertEqual(recorder.stages['count'][0], 1)
+            self.assertNotIn('diff', recorder.stages)
+            # building the pattern counts the mutants no more
+            status.pattern
+            self.assertEqual(recorder.stages['diff'][0], 1)
+        self.assertEqual(recorder.counters, {'reads': 1, 'mutations': 2,
+                                             'codons': 2})
+
+    def test_custom_recorder(self):
+        """register should report to a custom recorder until unregister"""
+
+        class Events(Recorder):
+            def __init__(self):
+                super(Events, self).__init__()
+                self.events = []
+
+            def on_stage(self, stage, seconds):
+                self.events.append(stage)
+
+        recorder = Events()
+        register(recorder)
+        try:
+            analyze(STDSEQ, STDSEQ, translate=False)
+        finally:
+            unregister(recorder)
+        analyze(STDSEQ, STDSEQ, translate=False)
+        self.assertEqual(recorder.events, ['diff', 'score', 'status', 'analyze'])
+        recorder.reset()
+        self.assertEqual(recorder.as_dict(), {'stages': {}, 'counters': {}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test for panel"""
+
+import random
+import unittest
+
+from pm import analyze
+from pm.panel import ReferencePanel
+from pm.status import Y, PM
+
+
+STDSEQS = ['ATGTCGTTCTGCAGCTTC', 'ATGTCATTCTGCAGCTTC', 'ATGTCGTTCTGGAGCTTT',
+           'ATG---TTCTGCAGCTTC']
+
+
+def _hamming(seq, stdseq):
+    return sum(a != b for a, b in zip(seq.upper(), stdseq.upper()))
+
+
+class RoutineTest(unittest.TestCase):
+    """Routine test."""
+
+    def test_distances(self):
+        """distances should be the Hamming distances to the references"""
+
+        rnd = random.Random(5)
+        stdseq = ''.join(rnd.choice('ACGT') for _ in range(300))
+        stdseqs = [''.join(rnd.choice('ACGT-') if rnd.random() < 0.05 else b
+                           for b in stdseq) for _ in range(40)]
+        panel = ReferencePanel(stdseqs)
+        for _ in range(20):
+            seq = ''.join(rnd.choice('ACGTa') if rnd.random() < 0.05 else b
+                          for b in rnd.choice(stdseqs))
+            self.assertEqual(panel.distances(seq).tolist(),
+                             [_hamming(seq, s) for s in stdseqs])
+
+    def test_shortlist(self):
+        """shortlist should give the nearest references first"""
+
+        panel = ReferencePanel(STDSEQS)
+        self.assertEqual(panel.shortlist(STDSEQS[2], k=1), [2])
+        self.assertEqual(panel.shortlist(STDSEQS[0], k=3), [0, 1, 2])
+        self.assertEqual(panel.shortlist(STDSEQS[3], k=10), [3, 0, 1, 2])
+        self.assertRaises(ValueError, panel.shortlist, STDSEQS[0], k=0)
+
+    def test_analyze(self):
+        """analyze should give the best status and its reference id"""
+
+        panel = ReferencePanel(STDSEQS, ids=['a', 'b', 'c', 'd'])
+        seq = 'ATGTCATTCTGCAGCTTC'
+        ref_id, status = panel.analyze(seq)
+        self.assertEqual(ref_id, 'b')
+        self.assertIsInstance(status, Y)
+        self.assertIs(status.reference, panel.references[1])
+
+        seq = 'ATGTCGTTCTGGAGCTTA'
+        ref_id, status = panel.analyze(seq, shortlist=1)
+        self.assertEqual(ref_id, 'c')
+        self.assertIsInstance(status, PM)
+        self.assertEqual(status.score, analyze(seq, STDSEQS[2]).score)
+
+    def test_raise_ValueError(self):
+        """ReferencePanel should reject inconsistent references and reads"""
+
+        self.assertRaises(ValueError, ReferencePanel, [])
+        self.assertRaises(ValueError, ReferencePanel, ['ATG', 'ATGC'])
+        self.assertRaises(ValueError, ReferencePanel, ['ATG'], ids=[1, 2])
+        panel = ReferencePanel(STDSEQS)
+        self.assertRaises(ValueError, panel.analyze, 'ATG')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test for parallel"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from pm import analyze
+from pm.parallel import analyze_alignment, find_stdseq
+
+
+STDSEQ = 'ATGTCGTTCTGCAGCTTCTTCGGGGGCGAGGTTTTCCAGAATCACTTTGAACCTGGCGCC'
+SEQS = [('r1', 'ATGTCGTTCTGCAGCTTCTTCGGGGGCGAGGTTTTCCAGAATCACTTTGAACCTGGCGCC'),
+        ('r2', 'ATGTCGTTCTGCAGCTTCTTCGGGGGCGAGGTTTTCCAGAATCACTTTGAACCTGGCGCT'),
+        ('r3', 'ATGTCGTTCTGCAGCTTCTTCGGGGGCGAGGTTTTCCAGAATCACTTTGAAACTGGCGCC'),
+        ('r4', 'ATGTCGTTCTGCAGCTTCTTCGGGGGCGAGGTTTTCCAGAATCACTTTGAACCTGGC-CC')]
+
+
+class RoutineTest(unittest.TestCase):
+    """Routine test."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'aln.fasta')
+        with open(self.path, 'w') as f:
+            f.write('>ref\n{}\n'.format(STDSEQ))
+            for record_id, seq in SEQS:
+                f.write('>{}\n{}\n{}\n'.format(record_id, seq[:30], seq[30:]))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_find_stdseq(self):
+        """find_stdseq should return the sequence of the record"""
+
+        self.assertEqual(find_stdseq(self.path, 'ref'), STDSEQ)
+        with self.assertRaises(KeyError):
+            find_stdseq(self.path, 'missing')
+
+    def test_analyze_alignment(self):
+        """analyze_alignment should give the same statuses as pm.analyze"""
+
+        cases = [(1, True, False), (2, True, False), (2, False, False)]
+        if sys.version_info >= (3, 8):
+            # shared memory
+            cases.append((2, True, True))
+        for workers, ordered, shared in cases:
+            results = list(analyze_alignment(self.path, 'ref', workers=workers,
+                                             ordered=ordered, chunksize=1,
+                                             shared=shared))
+            if not ordered:
+                results.sort(key=lambda r: r[0])
+            self.assertEqual([r[0] for r in results], [r[0] for r in SEQS])
+            for (record_id, seq), (_, status) in zip(SEQS, results):
+                ex = analyze(seq, STDSEQ)
+                self.assertIs(type(status), type(ex))
+                self.assertEqual(status.seq, seq)
+                self.assertEqual(status.stdseq, STDSEQ)
+                self.assertEqual((status.gaps, status.nt_pm, status.aa_pm),
+                                 (ex.gaps, ex.nt_pm, ex.aa_pm))
+                self.assertEqual(status.pattern.list(), ex.pattern.list())
+
+    def test_analyze_alignment_interleaved(self):
+        """analyze_alignment in process should not share its stdseq"""
+
+        stdseq = STDSEQ[:-1] + 'T'
+        path = os.path.join(self.tmpdir, 'aln2.fasta')
+        with open(path, 'w') as f:
+            f.write('>ref\n{}\n'.format(stdseq))
+            for record_id, seq in SEQS:
+                f.write('>{}\n{}\n'.format(record_id, seq))
+        first = analyze_alignment(self.path, 'ref', workers=1)
+        second = analyze_alignment(path, 'ref', workers=1)
+        for (record_id, seq), (_, s1), (_, s2) in zip(SEQS, first, second):
+            self.assertEqual(str(s1), str(analyze(seq, STDSEQ)))
+            self.assertEqual(str(s2), str(analyze(seq, stdseq)))
+            self.assertEqual(s2.stdseq, stdseq)
+
+    def test_analyze_alignment_error(self):
+        """analyze_alignment should keep seq in parent and raise errors"""
+
+        results = list(analyze_alignment(self.path, 'ref', workers=2,
+                                         light=True))
+        self.assertEqual([status.seq for _, status in results],
+                         [None] * len(SEQS))
+        with open(self.path, 'a') as f:
+            f.write('>short\nATG\n')
+        for ordered in (True, False):
+            with self.assertRaises(ValueError):
+                list(analyze_alignment(self.path, 'ref', workers=2,
+                                       ordered=ordered, chunksize=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
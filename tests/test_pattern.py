@@ -6,7 +6,9 @@ import sys
 import unittest
 from os.path import dirname, realpath
 
-from pm.pattern import (parse, mutant_to_str, PlainPattern, TranslatedPattern)
+from pm.pattern import (parse, mutant_to_str, mutants_to_str, pattern_to_str,
+                        write_patterns, PlainPattern, TranslatedPattern,
+                        CompactPlainPattern, CompactTranslatedPattern)
 
 
 class RoutineTestForFuncs(unittest.TestCase):
@@ -60,6 +62,82 @@ class RoutineTestForFuncs(unittest.TestCase):
                           ]
         self.assertEqual(obj.list(), ex_pattern_list)
 
+    def test_parse_matches_per_base_compare(self):
+        """parse should report exactly the positions where bases differ"""
+
+        import random
+        rnd = random.Random(7)
+        stdseq = ''.join(rnd.choice('ACGT-') for _ in range(3000))
+        seq = ''.join(b if rnd.random() < 0.9 else rnd.choice('acgtn-')
+                      for b in stdseq)
+        ex_pattern_dict = dict((i+1, (s, v)) for i, (s, v) in
+                               enumerate(zip(stdseq, seq.upper())) if s != v)
+
+        r = parse(seq, stdseq)
+        self.assertEqual(r.mutants, ex_pattern_dict)
+        self.assertEqual(list(r.mutants), sorted(ex_pattern_dict))
+
+    def test_parse_with_non_ascii_sequence(self):
+        """parse should still work on sequences out of the ascii range"""
+
+        r = parse(u"ATG\u00c5", u"ATGC")
+        self.assertEqual(r.mutants, {4: (u'C', u'\u00c5')})
+
+    def test_parse_with_table(self):
+        """parse should translate codons with the given genetic code table"""
+
+        stdseq = "ATGTGAAGA"
+        seq = "ATATGGAGG"
+        obj = parse(seq, stdseq, translate=True, table=2)
+        self.assertEqual(obj.aa_mutants, {1: ('M', 'M'), 2: ('W', 'W'),
+                                          3: ('*', '*')})
+        obj = parse(seq, stdseq, translate=True)
+        self.assertEqual(obj.aa_mutants, {1: ('M', 'I'), 2: ('*', 'W'),
+                                          3: ('R', 'R')})
+
+    def test_translate_codon_same_as_biopython(self):
+        """_translate_codon should agree with Bio.Seq.translate"""
+
+        from itertools import product
+        from Bio.Seq import translate
+        from pm.pattern import _translate_codon
+
+        for table in (1, 2, 11):
+            for bases in product('ACGTURYN', repeat=3):
+                codon = ''.join(bases)
+                self.assertEqual(_translate_codon(codon, table),
+                                 translate(codon, table=table))
+        self.assertEqual(_translate_codon('A-G'), '-')
+
+    def test_parse_with_compact(self):
+        """parse with compact=True should give the same pattern in arrays"""
+
+        stdseq = "ATG ACA AGG GTT UUG TAG TAC CGT".replace(' ', '')
+        seq =    "ACG CCA AGG GTT UUA TAC -A- AGA".replace(' ', '')
+
+        obj = parse(seq, stdseq, compact=True)
+        ex = parse(seq, stdseq)
+        self.assertIsInstance(obj, CompactPlainPattern)
+        self.assertEqual(obj.mutants, ex.mutants)
+        self.assertEqual(list(obj.mutants), list(ex.mutants))
+        self.assertEqual(obj.mutants[19], ('T', '-'))
+        self.assertNotIn(20, obj.mutants)
+        self.assertEqual(obj.list(), ex.list())
+
+        obj = parse(seq, stdseq, translate=True, compact=True)
+        ex = parse(seq, stdseq, translate=True)
+        self.assertIsInstance(obj, CompactTranslatedPattern)
+        self.assertEqual(obj.mutants, ex.mutants)
+        self.assertEqual(obj.aa_mutants, ex.aa_mutants)
+        self.assertEqual(list(obj.aa_mutants.values()),
+                         list(ex.aa_mutants.values()))
+        self.assertEqual(obj.assoc_dict, ex.assoc_dict)
+        self.assertEqual(obj.list(), ex.list())
+        self.assertFalse(hasattr(obj, '__dict__'))
+
+        obj = parse(stdseq, stdseq, translate=True, compact=True)
+        self.assertEqual((obj.mutants, obj.aa_mutants, obj.list()), ({}, {}, []))
+
     def test_mutant_to_str(self):
         """mutant_to_str should return the right result"""
 
@@ -68,6 +146,35 @@ class RoutineTestForFuncs(unittest.TestCase):
         self.assertEqual('12delT', mutant_to_str(12, 'T', '-'))
         self.assertEqual('20A=A', mutant_to_str(20, 'A', 'A'))
 
+    def test_bulk_to_str(self):
+        """mutants_to_str/pattern_to_str should join mutant_to_str of mutants"""
+
+        stdseq = "ATG ACA AGG GTT UUG TAG TAC CGT".replace(' ', '')
+        seq =    "ACG CCA AGG GTT UUA TAC -A- AGA".replace(' ', '')
+        for compact in (False, True):
+            obj = parse(seq, stdseq, compact=compact)
+            ex = ','.join(mutant_to_str(*m) for m in obj.list())
+            self.assertEqual(mutants_to_str(obj.mutants), ex)
+            self.assertEqual(pattern_to_str(obj), ex)
+
+            obj = parse(seq, stdseq, translate=True, compact=compact)
+            ex = ';'.join(mutant_to_str(*nt) + '/' + mutant_to_str(*aa)
+                          for nt, aa in obj.list())
+            self.assertEqual(pattern_to_str(obj, sep=';', assoc_sep='/'), ex)
+            self.assertEqual(mutants_to_str(obj.aa_mutants),
+                             '1M>T,2T>P,5L=L,6*>Y,7delY,8R=R')
+        self.assertEqual(pattern_to_str(parse(seq, seq, translate=True)), '')
+
+    def test_write_patterns(self):
+        """write_patterns should write a line for each pattern"""
+
+        import io
+
+        handle = io.StringIO()
+        write_patterns([parse('ACGT', 'ATGT'), parse('ACGT', 'ACGT'),
+                        parse('AC-T', 'ACG-')], handle)
+        self.assertEqual(handle.getvalue(), '2T>C\n\n3delG,4insT\n')
+
 
 class ErrorTestFor_parse(unittest.TestCase):
 
@@ -82,6 +189,15 @@ class ErrorTestFor_parse(unittest.TestCase):
         with self.assertRaises(TranslationError):
             parse(seq, stdseq, True)
 
+    def test_parse_with_bar_codon_twice(self):
+        """parse should keep raising TranslationError for a known bad codon"""
+
+        from pm.pattern import TranslationError
+
+        for _ in range(2):
+            with self.assertRaises(TranslationError):
+                parse("ATGTAP", "ATGTAC", True)
+
 
 if __name__ == '__main__':
     unittest.main()
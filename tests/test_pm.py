@@ -6,8 +6,9 @@ import sys
 import unittest
 from os.path import dirname, realpath
 
-from pm import analyze
-from pm.status import Y, Conserved, PM, NA
+from pm import (analyze, analyze_many, select_best, classify, reanalyze,
+                Reference)
+from pm.status import Y, Conserved, PM, NA, rank
 from pm.pattern import TranslatedPattern, PlainPattern
 
 
@@ -111,5 +112,256 @@ class RoutineTest(unittest.TestCase):
         self.assertIsInstance(status.pattern, PlainPattern)
 
 
+class BatchTest(unittest.TestCase):
+    """Test for analyze_many"""
+
+    def test_analyze_many(self):
+        """pm.analyze_many should give the same statuses as pm.analyze"""
+
+        stdseq = 'ATGTCGTTCTGCAGCTTCTTCGGGGGCGAGGTTTTCCAGAATCACTTTGAACCTGGCGCC'
+        seqs = ['ATGTCGTTCTGCAGCTTCTTCGGGGGCGAGGTTTTCCAGAATCACTTTGAACCTGGCGCC',
+                'ATGTCGTTCTGCAGCTTCTTCGGGGGCGAGGTTTTCCAGAATCACTTTGAACCTGGCGCT',
+                'ATGTCGTTCTGCAGCTTCTTCGGGGGCGAGGTTTTCCAGAATCACTTTGAAACTGGCGCC',
+                'ATGTCGTTCTGCAGCTTCTTCGGGGGCGAGGTTTTCCAGAATCACTTTGAACCTGGC-CC']
+        for translate in (True, False):
+            statuses = list(analyze_many(seqs, stdseq, translate=translate))
+            self.assertEqual(len(statuses), len(seqs))
+            for seq, status in zip(seqs, statuses):
+                ex = analyze(seq, stdseq, translate=translate)
+                self.assertIs(type(status), type(ex))
+                self.assertEqual(status.seq, seq)
+                self.assertEqual(status.stdseq, stdseq)
+                self.assertEqual((status.gaps, status.nt_pm, status.aa_pm),
+                                 (ex.gaps, ex.nt_pm, ex.aa_pm))
+                self.assertEqual(status.pattern.list(), ex.pattern.list())
+
+    def test_analyze_with_Reference(self):
+        """pm.analyze should accept a Reference object as stdseq"""
+
+        stdseq = 'ATG-CGTTC'
+        ref = Reference(stdseq)
+        status = analyze('ATGTCGTTC', ref, translate=False)
+        self.assertIsInstance(status, NA)
+        self.assertEqual(status.stdseq, stdseq)
+        self.assertEqual(status.gaps, 1)
+        self.assertIs(status.get_stdseq_without_gaps(), ref.stdseq_without_gaps)
+
+    def test_analyze_shares_reference(self):
+        """pm.analyze should share one reference between equal stdseqs"""
+
+        stdseq = 'ATGTCGTTC'
+        s1 = analyze('ATGTCGTTT', stdseq)
+        s2 = analyze('ATGTCGTTA', ''.join(list(stdseq)))
+        self.assertIs(s1.reference, s2.reference)
+
+    def test_analyze_with_light(self):
+        """pm.analyze with light=True should not keep seq"""
+
+        from pm.pattern import CompactTranslatedPattern
+
+        stdseq = 'ATGTCGTTCTGCAGCTTCTTCGGGGGCGAGGTTTTCCAGAATCACTTTGAAACT'
+        seq = 'ATGTCGTTCTGCAGCTTCTTCGGGGGCGAGGTTTTCCAGAATCACTTTGAACCT'
+        ex = analyze(seq, stdseq)
+        status = analyze(seq, stdseq, light=True)
+        self.assertIsInstance(status, PM)
+        self.assertIsNone(status.seq)
+        self.assertEqual(status.stdseq, stdseq)
+        self.assertIsInstance(status.pattern, CompactTranslatedPattern)
+        self.assertEqual(status.pattern.list(), ex.pattern.list())
+        self.assertEqual(status, ex)
+        self.assertIn("stdseq='{}'".format(stdseq), repr(status))
+
+    def test_analyze_with_lazy(self):
+        """pm.analyze with lazy=True should build the pattern on access"""
+
+        import random
+        rnd = random.Random(5)
+        stdseq = ''.join(rnd.choice('ACGT') for _ in range(300))
+        for rate in (0.0, 0.01, 0.05, 0.2):
+            seq = ''.join(rnd.choice('ACGTacgt-') if rnd.random() < rate else b
+                          for b in stdseq)
+            for translate in (True, False):
+                ex = analyze(seq, stdseq, translate=translate)
+                status = analyze(seq, stdseq, translate=translate, lazy=True)
+                self.assertIs(type(status), type(ex))
+                self.assertEqual((status.gaps, status.nt_pm, status.aa_pm),
+                                 (ex.gaps, ex.nt_pm, ex.aa_pm))
+                self.assertEqual(status.score, ex.score)
+                self.assertIsNone(status._pattern)
+                self.assertEqual(status.pattern.list(), ex.pattern.list())
+                self.assertIs(status.pattern, status.pattern)
+
+                # light model keeps no seq, the pattern is built at once
+                status = analyze(seq, stdseq, translate=translate, lazy=True,
+                                 light=True)
+                self.assertIsNone(status.seq)
+                self.assertIsNotNone(status._pattern)
+                self.assertIsNone(status._make_pattern)
+                self.assertEqual(status.pattern.list(), ex.pattern.list())
+
+    def test_analyze_shared_gap(self):
+        """a gap in both seq and stdseq should raise in every model"""
+
+        for lazy in (False, True):
+            with self.assertRaises(AssertionError):
+                analyze('AT-GAA', 'AT-GAA', translate=False, lazy=lazy)
+
+
+class SelectBestTest(unittest.TestCase):
+    """Test for select_best"""
+
+    def test_select_best(self):
+        """pm.select_best should give the same best statuses as sorting"""
+
+        import random
+        rnd = random.Random(3)
+        stdseq = ''.join(rnd.choice('ACGT') for _ in range(90))
+        seqs = [''.join(rnd.choice('ACGT-') if rnd.random() < rate else b
+                        for b in stdseq)
+                for rate in (0.0, 0.01, 0.02, 0.05, 0.1) for _ in range(20)]
+        rnd.shuffle(seqs)
+        for translate in (True, False):
+            statuses = [analyze(seq, stdseq, translate=translate)
+                        for seq in seqs]
+            ex = rank(statuses).tolist()
+            for k in (1, 5, 30, 200):
+                r = select_best(seqs, stdseq, k=k, translate=translate)
+                self.assertEqual([i for i, _ in r], ex[:k])
+                for i, status in r:
+                    self.assertIs(type(status), type(statuses[i]))
+                    self.assertEqual(status.seq, seqs[i])
+
+    def test_select_best_stop_early(self):
+        """pm.select_best should stop reading seqs once k Y are found"""
+
+        stdseq = 'ATGTCGTTC'
+
+        def seqs():
+            yield 'ATGTCGTTT'
+            yield stdseq
+            yield stdseq.lower()
+            raise AssertionError("seqs should not be read any more")
+
+        r = select_best(seqs(), stdseq, k=2)
+        self.assertEqual([i for i, _ in r], [1, 2])
+        self.assertEqual([str(s) for _, s in r], ['Y', 'Y'])
+
+    def test_select_best_raise_ValueError(self):
+        """pm.select_best should raise ValueError when k < 1"""
+
+        with self.assertRaises(ValueError):
+            select_best(['ATG'], 'ATG', k=0)
+
+
+class ClassifyTest(unittest.TestCase):
+    """Test for classify"""
+
+    def test_classify(self):
+        """pm.classify should give the status class of pm.analyze"""
+
+        import random
+        rnd = random.Random(11)
+        stdseq = ''.join(rnd.choice('ACGT') for _ in range(30000))
+        for rate in (0.0, 0.00005, 0.0002, 0.001):
+            for chars in ('ACGT', 'ACGT-', 'acgt'):
+                seq = ''.join(rnd.choice(chars) if rnd.random() < rate else b
+                              for b in stdseq)
+                for translate in (True, False):
+                    ex = analyze(seq, stdseq, translate=translate)
+                    self.assertIs(classify(seq, stdseq, translate=translate),
+                                  type(ex))
+
+    def test_classify_stop_early(self):
+        """pm.classify should stop scanning once the status is settled"""
+
+        stdseq = 'ATG' * 10000 + 'TAC'
+        seq = 'A-G' + 'ATG' * 9999 + 'TAP'
+        self.assertIs(classify(seq, stdseq), NA)
+        seq = 'ATC' + 'ATG' * 9999 + 'TAP'
+        self.assertIs(classify(seq, stdseq), PM)
+        seq = 'ATC' + 'ATG' * 9999 + 'T-C'
+        self.assertIs(classify(seq, stdseq), NA)
+        self.assertIs(classify('ATG', 'ATG'), Y)
+        self.assertIs(classify('CTG', 'CTA'), Conserved)
+
+    def test_classify_prepare_once(self):
+        """pm.classify should not prepare a str stdseq at each call"""
+
+        import pm.reference
+        prepared = []
+
+        class CountingReference(Reference):
+            def __init__(self, stdseq):
+                prepared.append(stdseq)
+                super(CountingReference, self).__init__(stdseq)
+
+        stdseq = 'ATGGCG' * 1000 + 'CCA'
+        pm.reference.Reference = CountingReference
+        try:
+            for _ in range(5):
+                self.assertIs(classify(stdseq[:-1] + 'G', stdseq), Conserved)
+        finally:
+            pm.reference.Reference = Reference
+        self.assertEqual(len(prepared), 1)
+
+
+class ReanalyzeTest(unittest.TestCase):
+    """pm.reanalyze test."""
+
+    def test_reanalyze(self):
+        """pm.reanalyze should equal to pm.analyze on the edited seq"""
+
+        import random
+        rnd = random.Random(7)
+        stdseq = ''.join(rnd.choice('ACGT') for _ in range(300))
+        for trial in range(200):
+            seq = ''.join(rnd.choice('ACGTacgt-') if rnd.random() < 0.02
+                          else b for b in stdseq)
+            edits = [(rnd.randint(1, 300), rnd.choice('ACGTa-'))
+                     for _ in range(rnd.randint(0, 6))]
+            changed = dict(edits)
+            edited = ''.join(changed.get(i+1, b) for i, b in enumerate(seq))
+            translate, compact = trial % 2 == 0, trial % 3 == 0
+            status = analyze(seq, stdseq, translate=translate, 
+                             compact=compact)
+            ex = analyze(edited, stdseq, translate=translate, compact=compact)
+            st = reanalyze(status, edits)
+            self.assertIs(type(st), type(ex))
+            self.assertEqual(st.seq, edited)
+            self.assertEqual((st.gaps, st.nt_pm, st.aa_pm),
+                             (ex.gaps, ex.nt_pm, ex.aa_pm))
+            self.assertIs(type(st.pattern), type(ex.pattern))
+            self.assertEqual(st.pattern.list(), ex.pattern.list())
+            self.assertEqual(status.seq, seq)
+
+    def test_reanalyze_status(self):
+        """pm.reanalyze should change the status with the edits"""
+
+        stdseq = 'ATGTCGTTCTGC'
+        st = reanalyze(analyze(stdseq, stdseq), [(6, 'A')])
+        self.assertIsInstance(st, Conserved)
+        st = reanalyze(st, [(12, 'G')])
+        self.assertIsInstance(st, PM)
+        self.assertEqual(st.pattern.list(), [((6, 'G', 'A'), (2, 'S', 'S')),
+                                             ((12, 'C', 'G'), (4, 'C', 'W'))])
+        st = reanalyze(st, [(6, 'G'), (12, 'C'), (1, '-')])
+        self.assertIsInstance(st, NA)
+        self.assertEqual(st.seq, '-TGTCGTTCTGC')
+        st = reanalyze(analyze(stdseq.encode('ascii'), stdseq), [(1, 'A')])
+        self.assertIsInstance(st, Y)
+        self.assertEqual(st.seq, stdseq.encode('ascii'))
+
+    def test_reanalyze_raise_ValueError(self):
+        """pm.reanalyze should raise ValueError for invalid edits"""
+
+        stdseq = 'ATGTCGTTCTGC'
+        status = analyze(stdseq, stdseq)
+        self.assertRaises(ValueError, reanalyze, status, [(13, 'A')])
+        self.assertRaises(ValueError, reanalyze, status, [(0, 'A')])
+        self.assertRaises(ValueError, reanalyze, status, [(1, 'AT')])
+        self.assertRaises(ValueError, reanalyze,
+                          analyze(stdseq, stdseq, light=True), [(1, 'C')])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test for reference"""
+
+import unittest
+
+from pm.pattern import parse, TranslationError
+from pm.reference import Reference
+
+
+class RoutineTest(unittest.TestCase):
+    """Routine test."""
+
+    def test_reference_attributes(self):
+        """Reference should prepare the stdseq once"""
+
+        ref = Reference("atg-CAAGGGTT")
+        self.assertEqual(ref.stdseq, "atg-CAAGGGTT")
+        self.assertEqual(ref.upper, "ATG-CAAGGGTT")
+        self.assertEqual(ref.length, 12)
+        self.assertEqual(len(ref), 12)
+        self.assertEqual(ref.gaps, 1)
+        self.assertEqual(ref.stdseq_without_gaps, "ATGCAAGGGTT")
+
+    def test_aa(self):
+        """Reference.aa should translate the codon at the amino position"""
+
+        ref = Reference("ATGACA-GGTAG")
+        self.assertEqual(ref.aa(1), 'M')
+        self.assertEqual(ref.aa(2), 'T')
+        self.assertEqual(ref.aa(3), '-')
+        self.assertEqual(ref.aa(4), '*')
+
+    def test_parse_same_as_pattern_parse(self):
+        """Reference.parse should give the same pattern as pm.pattern.parse"""
+
+        stdseq = "ATGACAAGGGTTUUGTAGTACCGT"
+        seq = "ACGCCAAGGGTTUUATAC-A-AGA"
+        ref = Reference(stdseq)
+        for translate in (False, True):
+            ex = parse(seq, stdseq, translate=translate)
+            r = ref.parse(seq, translate=translate)
+            self.assertIs(type(r), type(ex))
+            self.assertEqual(r.list(), ex.list())
+
+
+class ErrorTest(unittest.TestCase):
+
+    def test_parse_raise_KeyError(self):
+        """Reference.parse should raise KeyError with inconsistent length"""
+
+        with self.assertRaises(KeyError):
+            Reference("ATGC").parse("ATG")
+
+    def test_aa_raise_TranslationError(self):
+        """Reference.aa should raise TranslationError for invalid codon"""
+
+        with self.assertRaises(TranslationError):
+            Reference("ATGTAP").aa(2)
+
+
+if __name__ == '__main__':
+    unittest.main()
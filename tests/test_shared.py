@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test for shared"""
+
+import pickle
+import unittest
+from functools import partial
+
+from pm import analyze
+from pm.reference import Reference
+try:
+    from concurrent.futures import ProcessPoolExecutor
+    from pm.shared import SharedReference
+except ImportError:
+    # Python 3.7 or earlier
+    SharedReference = None
+
+
+STDSEQ = 'atgTCGTTCTGCAGCTTCNNA---TGGTAG'
+SEQS = ['ATGTCGTTCTGCAGCTTCNNAGGCTGGTAG', 'ATGTCATTCTGGAGCTTCNNAGGCTGGTAG',
+        'ATGTCGTTCTGCAGCTTCNNAGGCTG-TAG']
+
+
+def _analyze(seq, reference):
+    status = analyze(seq, reference)
+    return (str(status), status.pattern.list(), reference.name)
+
+
+@unittest.skipIf(SharedReference is None,
+                 "pm.shared needs Python 3.8 or later")
+class RoutineTest(unittest.TestCase):
+    """Routine test."""
+
+    def test_create(self):
+        """SharedReference should hold the prepared stdseq"""
+
+        ref = Reference(STDSEQ)
+        with SharedReference.create(STDSEQ) as shared:
+            self.assertEqual((shared.length, shared.gaps, len(shared)),
+                             (ref.length, ref.gaps, len(ref)))
+            self.assertEqual(shared.stdseq, ref.upper)
+            self.assertEqual(shared.upper, ref.upper)
+            self.assertEqual(shared.stdseq_without_gaps,
+                             ref.stdseq_without_gaps)
+            self.assertEqual(shared.fingerprint, ref.fingerprint)
+            self.assertEqual(shared.digest, ref.digest)
+            for table in (1, 2):
+                self.assertEqual([shared.aa(i, table) for i in range(1, 11)],
+                                 [ref.aa(i, table) for i in range(1, 11)])
+            self.assertIs(pickle.loads(pickle.dumps(shared)), shared)
+            self.assertIs(SharedReference.attach(shared.name), shared)
+        self.assertRaises(ValueError, SharedReference.create, 'ATGÄ')
+
+    def test_analyze(self):
+        """statuses against SharedReference should equal to pm.analyze"""
+
+        with SharedReference.create(STDSEQ) as shared:
+            for seq in SEQS:
+                ex = analyze(seq, STDSEQ)
+                status = analyze(seq, shared)
+                self.assertIs(type(status), type(ex))
+                self.assertEqual(status.pattern.list(), ex.pattern.list())
+                self.assertIs(status.reference, shared)
+                self.assertEqual(status.score, ex.score)
+                self.assertFalse(status < ex or status > ex)
+        # the block is removed, statuses are pointed to a local Reference
+        self.assertRaises(ValueError, getattr, status, 'stdseq')
+        self.assertRaises(ValueError, shared.aa, 1)
+        status.reference = Reference(STDSEQ)
+        self.assertEqual(status.stdseq, STDSEQ)
+        self.assertEqual(status.pattern.list(), ex.pattern.list())
+
+    def test_pileup(self):
+        """MutationPileup should count against SharedReference"""
+
+        from pm.aggregate import MutationPileup
+        ex = MutationPileup(STDSEQ)
+        ex.update(SEQS)
+        with SharedReference.create(STDSEQ) as shared:
+            pileup = MutationPileup(shared)
+            pileup.update(SEQS[:1])
+            other = MutationPileup(shared)
+            other.update(SEQS[1:])
+            pileup.merge(other)
+            self.assertEqual(pileup.nt_counts.tolist(), ex.nt_counts.tolist())
+            self.assertEqual(pileup.aa_counts.tolist(), ex.aa_counts.tolist())
+            pileup.merge(ex)
+            self.assertEqual(pileup.reads, len(SEQS) * 2)
+
+    def test_workers(self):
+        """workers should attach to the shared memory by name"""
+
+        with SharedReference.create(STDSEQ) as shared:
+            with ProcessPoolExecutor(2) as executor:
+                results = list(executor.map(partial(_analyze,
+                                                    reference=shared), SEQS))
+            for seq, (name, pattern, block) in zip(SEQS, results):
+                ex = analyze(seq, STDSEQ)
+                self.assertEqual((name, pattern), (str(ex), ex.pattern.list()))
+                self.assertEqual(block, shared.name)
+            # still usable after the workers exit
+            self.assertEqual(analyze(SEQS[0], shared).pattern.list(),
+                             analyze(SEQS[0], STDSEQ).pattern.list())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,7 @@ import sys
 import unittest
 from os.path import dirname, realpath
 
-from pm.status import Y, Conserved, PM, NA
+from pm.status import Y, Conserved, PM, NA, MAX_BASE, rank, sort_key
 
 class RoutineTest(unittest.TestCase):
     """Routine test."""
@@ -67,6 +67,90 @@ class RoutineTest(unittest.TestCase):
 
         self.assertTrue(PM(stdseq='ATGATT', nt_pm=1) > NA(stdseq='ATG-ATT', gaps=1, nt_pm=1))
 
+    def test_pm_status_with_reference(self):
+        """pm.status should share the gaps-removed stdseq of its reference"""
+
+        from pm.reference import Reference
+
+        ref = Reference('atg-att')
+        status = PM(nt_pm=1, reference=ref)
+        self.assertIs(status.stdseq, ref.stdseq)
+        self.assertIs(status.reference, ref)
+        self.assertIs(status.get_stdseq_without_gaps(), ref.stdseq_without_gaps)
+        self.assertTrue(Y(stdseq='ATGATT') > status)
+
+    def test_pm_status_fingerprint(self):
+        """pm.status should compare stdseqs through their fingerprints"""
+
+        from pm.reference import Reference
+
+        ref = Reference('ATG-ATT')
+        self.assertEqual(PM(stdseq='atgatt').get_fingerprint(), ref.fingerprint)
+        self.assertIsNone(PM().get_fingerprint())
+        self.assertTrue(PM(stdseq='atgatt') > NA(reference=ref))
+        with self.assertRaises(TypeError):
+            PM(stdseq='atgatc') > NA(reference=ref)
+        statuses = [NA(reference=ref), Y(reference=ref), PM(reference=ref)]
+        self.assertEqual([str(s) for s in sorted(statuses)], ['NA', 'PM', 'Y'])
+
+    def test_pm_status_slotted(self):
+        """pm.status objects should not have __dict__"""
+
+        for status in (Y(), Conserved(aa_pm=0), PM(), NA()):
+            self.assertFalse(hasattr(status, '__dict__'))
+
+    def test_pm_status_sort_key(self):
+        """statuses should compare as their exact sort keys do"""
+
+        import random
+        rnd = random.Random(5)
+
+        def random_status():
+            cls = rnd.choice((Y, Conserved, PM, NA))
+            aa_pm = 0 if cls is Conserved else rnd.choice((None, 0, 1, 3))
+            return cls(gaps=rnd.choice((0, 0, 1)), aa_pm=aa_pm,
+                       nt_pm=rnd.choice((0, 6, 16, rnd.randint(0, 50),
+                                         MAX_BASE * 20)))
+
+        for _ in range(2000):
+            a, b = random_status(), random_status()
+            self.assertEqual(a.sort_key(), sort_key(str(a), a.gaps, a.nt_pm,
+                                                    a.aa_pm))
+            ka, kb = a.sort_key(), b.sort_key()
+            self.assertEqual((a == b, a < b, a <= b, a > b, a >= b),
+                             (ka == kb, ka < kb, ka <= kb, ka > kb, ka >= kb))
+
+        # equal keys though the float scores are rounded differently
+        self.assertEqual(PM(nt_pm=16, aa_pm=1), PM(nt_pm=6, aa_pm=3))
+        big = MAX_BASE * 20
+        self.assertLess(Conserved(nt_pm=big, aa_pm=0).score, PM(aa_pm=1).score)
+        self.assertTrue(Conserved(nt_pm=big, aa_pm=0) > PM(aa_pm=1))
+        self.assertTrue(Y(nt_pm=big, aa_pm=0) > Y(nt_pm=big + 1, aa_pm=0))
+        self.assertTrue(PM(aa_pm=big) > NA(gaps=1))
+
+    def test_rank(self):
+        """rank should order statuses as sorted does, the best first"""
+
+        import random
+        rnd = random.Random(3)
+        statuses = []
+        for _ in range(500):
+            cls = rnd.choice((Y, Conserved, PM, NA))
+            aa_pm = 0 if cls is Conserved else rnd.choice((None, 0, 3))
+            statuses.append(cls(gaps=rnd.choice((0, 0, 1)), aa_pm=aa_pm,
+                                nt_pm=rnd.choice((0, 5, MAX_BASE * 2))))
+        ex = sorted(range(len(statuses)),
+                    key=lambda i: (statuses[i].sort_key(), -i), reverse=True)
+        self.assertEqual(rank(statuses).tolist(), ex)
+        self.assertEqual([id(statuses[i]) for i in rank(statuses)],
+                         [id(s) for s in sorted(statuses, reverse=True)])
+        self.assertEqual(rank(statuses, k=7).tolist(), ex[:7])
+        self.assertEqual(rank(statuses, k=1000).tolist(), ex)
+        self.assertEqual(rank([]).tolist(), [])
+        self.assertRaises(ValueError, rank, statuses, k=0)
+        with self.assertRaises(TypeError):
+            rank([Y(stdseq='atg'), NA(stdseq='tga')])
+
 
 class ErrorTest(unittest.TestCase):
 
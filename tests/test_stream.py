@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Unit test for stream"""
+
+import io
+import unittest
+
+from pm import analyze
+from pm.status import Y, Conserved, NA
+from pm.stream import iter_fasta, iter_analyze
+
+
+STDSEQ = 'ATGTCGTTCTGCAGCTTC'
+FASTA = u""">r1 first read
+ATGTCGTTC
+TGCAGCTTC
+>r2
+ATGTCGTTCTGCAGCTTT
+>r3
+ATGTCG-TCTGCAGCTTC
+"""
+
+
+class RoutineTest(unittest.TestCase):
+    """Routine test."""
+
+    def test_iter_fasta(self):
+        """iter_fasta should yield record ids and joined sequences"""
+
+        self.assertEqual(list(iter_fasta(io.StringIO(FASTA))),
+                         [('r1', STDSEQ),
+                          ('r2', 'ATGTCGTTCTGCAGCTTT'),
+                          ('r3', 'ATGTCG-TCTGCAGCTTC')])
+
+    def test_iter_analyze(self):
+        """iter_analyze should lazily yield record ids and statuses"""
+
+        results = iter_analyze(io.StringIO(FASTA), STDSEQ)
+        self.assertFalse(isinstance(results, list))
+        results = list(results)
+        self.assertEqual([r[0] for r in results], ['r1', 'r2', 'r3'])
+        self.assertEqual([type(r[1]) for r in results], [Y, Conserved, NA])
+        for (_, seq), (_, status) in zip(iter_fasta(io.StringIO(FASTA)),
+                                         results):
+            ex = analyze(seq, STDSEQ)
+            self.assertEqual(status.pattern.list(), ex.pattern.list())
+
+
+if __name__ == '__main__':
+    unittest.main()